@@ -0,0 +1,32 @@
+# micro benchmark of the old clean_tweet regex against TweetCleaner
+# usage: python benchmarks/bench_cleaner.py [number of tweets for the large run]
+import re
+import sys
+
+from bench_common import best_time, load_tweets, scale_to
+from twitter_cleaner import TweetCleaner
+
+
+# the cleaner TwitterAnalyser.clean_tweet used before TweetCleaner, kept here to time against
+def old_clean_tweet(tweet):
+    return ' '.join(re.sub("(@[A-Za-z0-9]+)|([^0-9A-Za-z\t]) |([\\w+:\\/\\/\\s+])", "", tweet).split())
+
+
+def report(name, texts, repeat):
+    cleaner = TweetCleaner()
+    old = best_time(lambda: [old_clean_tweet(tweet) for tweet in texts], repeat)
+    single = best_time(lambda: [cleaner.clean(tweet) for tweet in texts], repeat)
+    batch = best_time(lambda: cleaner.clean_batch(texts), repeat)
+    print("%s (%d tweets)" % (name, len(texts)))
+    print("  old clean_tweet:    %.0f tweets/sec" % (len(texts) / old))
+    print("  TweetCleaner.clean: %.0f tweets/sec" % (len(texts) / single))
+    print("  clean_batch:        %.0f tweets/sec" % (len(texts) / batch))
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    texts = [tweet['text'] for tweet in load_tweets()]
+
+    report("tweets.txt", texts, repeat=200)
+    # the capture repeated up to a million tweets
+    report("large corpus", scale_to(texts, num_tweets), repeat=1)
@@ -0,0 +1,62 @@
+# replays a capture into a raw JSON lines file and into parquet files, then compares size on disk and load time
+# usage: python benchmarks/bench_columnar.py [number of tweets to replay]
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from bench_common import best_time, load_tweets, scale_to
+from twitter_columnar import ColumnarWriter, load_columnar
+from twitter_core import TwitterAnalyser
+from twitter_reader import TweetFileReader
+
+
+def load_json_lines(path):
+    return pd.DataFrame([tweet for chunk in TweetFileReader(path).chunks() for tweet in chunk])
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    # the capture repeated, with a fresh id and text on every copy so parquet cannot just compress the repeats away
+    tweets = []
+    for i, tweet in enumerate(scale_to(load_tweets(), num_tweets)):
+        tweet = dict(tweet, id=tweet['id'] + i, text="%s %d" % (tweet['text'], i))
+        tweets.append(tweet)
+    polarity = TwitterAnalyser().analyse_polarity_batch([tweet['text'] for tweet in tweets])
+    work_dir = tempfile.mkdtemp()
+    try:
+        # raw capture, the way StdOutListener writes it
+        raw_path = os.path.join(work_dir, "tweets.txt")
+        with open(raw_path, 'wb') as tf:
+            for tweet in tweets:
+                tf.write(json.dumps(tweet).encode('utf-8') + b"\n")
+
+        # columnar capture, fed in the batch sizes the ingest pipeline uses
+        columnar_dir = os.path.join(work_dir, "columnar")
+        columnar_writer = ColumnarWriter(columnar_dir)
+        for start in range(0, num_tweets, 100):
+            columnar_writer.add(tweets[start:start + 100], polarity[start:start + 100])
+        columnar_writer.close()
+
+        raw_size = os.path.getsize(raw_path)
+        columnar_size = directory_size(columnar_dir)
+        raw_load = best_time(lambda: load_json_lines(raw_path))
+        columnar_load = best_time(lambda: load_columnar(columnar_dir))
+        assert np.array_equal(load_columnar(columnar_dir)['id'].values, [tweet['id'] for tweet in tweets])
+
+        print("tweets:        %d" % num_tweets)
+        print("json lines:    %.1f MB, loaded in %.3fs" % (raw_size / 1e6, raw_load))
+        print("parquet:       %.2f MB, loaded in %.3fs" % (columnar_size / 1e6, columnar_load))
+        print("disk saving:   %.0fx smaller" % (raw_size / columnar_size))
+        print("load speed up: %.0fx" % (raw_load / columnar_load))
+    finally:
+        shutil.rmtree(work_dir)
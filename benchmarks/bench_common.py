@@ -0,0 +1,34 @@
+# shared helpers for the benchmark scripts in this folder
+import os
+import sys
+import time
+
+# the benchmarks live one folder down from the project modules so add the project root to the path
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+TWEETS_FILE = os.path.join(PROJECT_ROOT, "tweets.txt")
+
+
+# every tweet in a capture file, with the whole payload
+def load_tweets(path=TWEETS_FILE):
+    from twitter_reader import TweetFileReader
+    return list(TweetFileReader(path, fields=None))
+
+
+# repeat the captured data until there are n items so small captures can stand in for big ones
+def scale_to(items, n):
+    return (items * (n // len(items) + 1))[:n]
+
+
+# run func a few times and keep the best wall clock time in seconds
+def best_time(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
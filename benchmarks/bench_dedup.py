@@ -0,0 +1,50 @@
+# scoring every distinct text against scoring each cluster of retweets and near duplicates once (Deduplicator)
+# usage: python benchmarks/bench_dedup.py [number of tweets]
+import random
+import sys
+
+import numpy as np
+
+from bench_common import best_time, load_tweets, scale_to
+from twitter_core import TwitterAnalyser
+from twitter_dedup import Deduplicator
+
+
+# the captured tweets repeated with what makes real copies differ: a different link, a "via @someone",
+# an extra hashtag, so factorizing on the exact text can't fold them together the way Deduplicator does
+def varied_copies(tweets, n):
+    random.seed(0)
+    copies = []
+    for i, tweet in enumerate(scale_to(tweets, n)):
+        tweet = dict(tweet)
+        if i >= len(tweets):
+            tweet['id'] = tweet['id'] + i
+            ending = random.choice(("", " https://t.co/%08x" % random.getrandbits(32), " via @user%d" % (i % 97),
+                                    " #trending"))
+            tweet['text'] = tweet['text'] + ending
+        copies.append(tweet)
+    return copies
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tweets = varied_copies(load_tweets(), num_tweets)
+    texts = [tweet['text'] for tweet in tweets]
+    analyser = TwitterAnalyser()
+    analyser.analyse_polarity_batch([""])  # lexicon loaded before timing
+
+    plain = analyser.analyse_polarity_batch(texts)
+    deduplicator = Deduplicator()
+    deduped, clusters = deduplicator.polarity(tweets, analyser)
+    # a varied copy gets its original's polarity, the label is the same for nearly all of them
+    agree = (np.sign(plain) == np.sign(deduped)).mean()
+
+    plain_time = best_time(lambda: analyser.analyse_polarity_batch(texts))
+    dedup_time = best_time(lambda: Deduplicator().polarity(tweets, analyser))
+    print("tweets:                 %d" % num_tweets)
+    print("distinct texts:         %d" % len(set(texts)))
+    print("clusters (texts scored): %d" % deduplicator.scored)
+    print("same label:             %.1f%%" % (agree * 100))
+    print("distinct texts scored:  %.0f tweets/sec" % (num_tweets / plain_time))
+    print("deduplicated:           %.0f tweets/sec" % (num_tweets / dedup_time))
+    print("speed up:               %.1fx" % (plain_time / dedup_time))
@@ -0,0 +1,54 @@
+# fetches many timelines from the fake API server one handle after another (like TwitterClient)
+# and then with TimelineFetcher
+# usage: python benchmarks/bench_fetcher.py [handles] [tweets per handle] [workers]
+import sys
+import time
+
+from tweepy import Cursor
+
+from fake_twitter_api import FakeTwitterAPI
+from twitter_fetcher import TimelineFetcher
+
+
+if __name__ == "__main__":
+    num_handles = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    num_tweets = int(sys.argv[2]) if len(sys.argv) > 2 else 600
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    handles = ["handle_%d" % i for i in range(num_handles)]
+
+    fake = FakeTwitterAPI(latency=0.05).start()
+    try:
+        # one handle after another, paging the way TwitterClient.get_user_timeline_tweets does
+        api = fake.api()
+        api.session.mount('https://', fake.adapter())
+        start = time.perf_counter()
+        sequential = {handle: list(Cursor(api.user_timeline, screen_name=handle, count=200).items(num_tweets))
+                      for handle in handles}
+        sequential_time = time.perf_counter() - start
+
+        fetcher = TimelineFetcher(fake.api(), workers=workers, adapter=fake.adapter(pool_maxsize=workers))
+        start = time.perf_counter()
+        concurrent = fetcher.fetch_user_timelines(handles, num_tweets)
+        concurrent_time = time.perf_counter() - start
+
+        assert {handle: [tweet.id for tweet in tweets] for handle, tweets in sequential.items()} == \
+               {handle: [tweet.id for tweet in tweets] for handle, tweets in concurrent.items()}
+        print("%d handles x %d tweets, %d requests" % (num_handles, num_tweets, fake.requests))
+        print("one at a time:       %.2fs" % sequential_time)
+        print("TimelineFetcher(%d): %.2fs" % (workers, concurrent_time))
+        print("speed up:            %.1fx" % (sequential_time / concurrent_time))
+
+        # a limit of 20 requests a 2 second window, the fetcher should wait rather than get 429s
+        limited = FakeTwitterAPI(latency=0.01, rate_limit=20, window=2).start()
+        try:
+            fetcher = TimelineFetcher(limited.api(), workers=workers,
+                                      adapter=limited.adapter({'/1.1/statuses/user_timeline.json': 20},
+                                                              window=2, pool_maxsize=workers))
+            start = time.perf_counter()
+            fetcher.fetch_user_timelines(handles[:10], num_tweets)
+            print("rate limited run:    %d requests in %.2fs, %d answered 429 and retried"
+                  % (limited.requests, time.perf_counter() - start, limited.rejected))
+        finally:
+            limited.stop()
+    finally:
+        fake.stop()
@@ -0,0 +1,55 @@
+# times tweet_to_data_frame against the seven pass version it replaced, on tweepy Status objects and raw dicts
+# usage: python benchmarks/bench_frame.py [sizes...]
+import sys
+
+import numpy as np
+import pandas as pd
+from tweepy.models import Status
+
+from bench_common import best_time, load_tweets, scale_to
+from twitter_core import TwitterAnalyser
+from twitter_reader import TWEET_FIELDS
+
+
+# tweet_to_data_frame before the single pass version, kept here to time against
+def old_tweet_to_data_frame(tweets):
+    df = pd.DataFrame(data=[tweet.text for tweet in tweets], columns=['tweets'])
+    df['id'] = np.array([tweet.id for tweet in tweets])
+    df['len'] = np.array([len(tweet.text) for tweet in tweets])
+    df['date'] = np.array([tweet.created_at for tweet in tweets])
+    df['source'] = np.array([tweet.source for tweet in tweets])
+    df['likes'] = np.array([tweet.favorite_count for tweet in tweets])
+    df['retweets'] = np.array([tweet.retweet_count for tweet in tweets])
+    return df
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [10000, 100000, 1000000]
+
+    tweet_analyser = TwitterAnalyser()
+    captured = load_tweets()
+    statuses = [Status.parse(None, tweet) for tweet in captured]
+    records = [{field: tweet[field] for field in TWEET_FIELDS} for tweet in captured]
+
+    # same values whichever way the frame is built
+    old = old_tweet_to_data_frame(statuses)
+    for new in (tweet_analyser.tweet_to_data_frame(statuses), tweet_analyser.tweet_to_data_frame(records)):
+        assert old['id'].tolist() == new['id'].tolist() and old['source'].tolist() == new['source'].tolist()
+        assert (pd.to_datetime(old['date'], utc=True) == new['date']).all()
+
+    for size in sizes:
+        size_statuses = scale_to(statuses, size)
+        size_records = scale_to(records, size)
+        repeat = 3 if size <= 100000 else 1
+        old_time = best_time(lambda: old_tweet_to_data_frame(size_statuses), repeat)
+        status_time = best_time(lambda: tweet_analyser.tweet_to_data_frame(size_statuses), repeat)
+        record_time = best_time(lambda: tweet_analyser.tweet_to_data_frame(size_records), repeat)
+        print("%d tweets" % size)
+        print("  seven pass (Status):  %.3fs" % old_time)
+        print("  single pass (Status): %.3fs" % status_time)
+        print("  single pass (dicts):  %.3fs" % record_time)
+
+    frame = tweet_analyser.tweet_to_data_frame(size_statuses)
+    print("memory of the last frame: %.1f MB typed, %.1f MB before"
+          % (frame.memory_usage(deep=True).sum() / 1e6,
+             old_tweet_to_data_frame(size_statuses).memory_usage(deep=True).sum() / 1e6))
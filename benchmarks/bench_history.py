@@ -0,0 +1,118 @@
+# peak memory and time of the engagement and sentiment stats over a whole capture: one data frame against
+# HistoryStats a chunk at a time, from the raw capture file and from a columnar capture
+# usage: python benchmarks/bench_history.py [number of tweets in the generated capture]
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bench_common import load_tweets
+from twitter_core import TwitterAnalyser
+from twitter_reader import CREATED_AT_FORMAT, TweetFileReader
+
+
+# a capture of num_tweets tweets, each copy of tweets.txt moved an hour later so the data covers months
+def write_capture(path, num_tweets):
+    tweets = load_tweets()
+    with open(path, 'wb') as tf:
+        for i in range(num_tweets):
+            tweet = dict(tweets[i % len(tweets)])
+            created_at = datetime.strptime(tweet['created_at'], CREATED_AT_FORMAT) + \
+                timedelta(hours=i // len(tweets))
+            tweet['created_at'] = created_at.strftime(CREATED_AT_FORMAT)
+            tweet['id'] = i
+            tf.write(json.dumps(tweet).encode('utf-8') + b"\r\n\r\n")
+
+
+def write_columnar(capture, directory):
+    from twitter_columnar import ColumnarWriter
+
+    analyser = TwitterAnalyser()
+    writer = ColumnarWriter(directory, rows_per_file=100000)
+    for chunk in TweetFileReader(capture).chunks(10000):
+        writer.add(chunk, analyser.analyse_polarity_batch([tweet['text'] for tweet in chunk]))
+    writer.close()
+
+
+# the way twitter_visualisation does it, everything in one frame
+def frame_stats(df):
+    by_source = df.groupby('source', observed=True)['sentiment'].agg(
+        tweets='size', positive=lambda s: (s > 0).mean())
+    by_day = df.groupby(df['date'].dt.floor('D'))['sentiment'].agg(tweets='size', positive=lambda s: (s > 0).mean())
+    return np.mean(df['len']), np.max(df['likes']), np.max(df['retweets']), by_source, by_day
+
+
+# the process's peak resident memory in MB, VmHWM (unlike ru_maxrss) starts again from nothing at exec
+def peak_mb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+def run(mode, path):
+    from twitter_history import HistoryStats, capture_chunks, columnar_chunks
+
+    analyser = TwitterAnalyser()
+    if mode == 'capture frame':
+        df = analyser.tweet_to_data_frame(TweetFileReader(path))
+        df['sentiment'] = np.sign(analyser.analyse_polarity_batch(df['tweets'].tolist())).astype(np.int64)
+        stats = frame_stats(df)
+        return len(df), stats[0]
+    if mode == 'capture chunks':
+        history = HistoryStats().add_chunks(capture_chunks(path, analyser))
+    elif mode == 'columnar frame':
+        from twitter_columnar import load_columnar
+        df = load_columnar(path)
+        stats = frame_stats(df)
+        return len(df), stats[0]
+    else:
+        history = HistoryStats().add_chunks(columnar_chunks(path))
+    history.sentiment_by_source()
+    history.sentiment_over_time()
+    history.timeline()
+    return history.tweets, history.summary()['mean_len']
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['--imports']:
+        import pyarrow.parquet
+        import twitter_history
+        TwitterAnalyser().analyse_polarity_batch([""])
+        print(peak_mb())
+        sys.exit()
+    if len(sys.argv) > 2 and sys.argv[1] == '--run':  # one measurement, in its own process for its peak memory
+        start = time.perf_counter()
+        tweets, mean_len = run(sys.argv[2], sys.argv[3])
+        print("%d %.6f %.2f %.1f" % (tweets, mean_len, time.perf_counter() - start, peak_mb()))
+        sys.exit()
+
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    directory = tempfile.mkdtemp()
+    try:
+        capture = os.path.join(directory, "tweets.txt")
+        columnar = os.path.join(directory, "columnar")
+        write_capture(capture, num_tweets)
+        write_columnar(capture, columnar)
+        print("capture: %d tweets, %.1f MB raw" % (num_tweets, os.path.getsize(capture) / 1e6))
+        # a process doing nothing but the imports, subtracted to show what the data itself costs
+        baseline = float(subprocess.run([sys.executable, os.path.abspath(__file__), '--imports'],
+                                        capture_output=True, text=True, check=True).stdout)
+        print("%-16s %10s %10s %14s" % ("", "seconds", "peak MB", "over imports"))
+        results = {}
+        for mode, path in (('capture frame', capture), ('capture chunks', capture),
+                           ('columnar frame', columnar), ('columnar chunks', columnar)):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run', mode, path],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            tweets, mean_len, seconds, peak = int(output[0]), float(output[1]), float(output[2]), float(output[3])
+            results[mode] = (tweets, round(mean_len, 6))
+            print("%-16s %10.2f %10.1f %14.1f" % (mode, seconds, peak, peak - baseline))
+        assert len(set(results.values())) == 1, results
+    finally:
+        shutil.rmtree(directory)
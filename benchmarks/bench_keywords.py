@@ -0,0 +1,38 @@
+# tagging tweets with the keywords they match: one search per keyword against KeywordMatcher's single pass
+# usage: python benchmarks/bench_keywords.py [number of tweets]
+import random
+import re
+import sys
+
+from bench_common import best_time, load_tweets, scale_to
+from twitter_keywords import KeywordMatcher, tweet_text
+
+
+# what grouping by keyword costs without the matcher, the text is searched again for every keyword
+def per_keyword(texts, keywords):
+    searches = [(keyword, re.compile(r'(?<!\w)%s(?!\w)' % re.escape(keyword.casefold()))) for keyword in keywords]
+    tagged = []
+    for text in texts:
+        text = text.casefold()
+        tagged.append([keyword for keyword, search in searches if search.search(text)])
+    return tagged
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    texts = scale_to([tweet_text(tweet) for tweet in load_tweets()], num_tweets)
+    # track lists of growing size, the stream's four names plus words that do show up in the tweets
+    vocabulary = sorted({word for text in texts for word in re.findall(r'[^\W\d_]{3,}', text.casefold())})
+    random.seed(0)
+    print("%9s %10s %16s %16s" % ("keywords", "tweets", "per keyword", "KeywordMatcher"))
+    for size in (4, 100, 1000, 5000):
+        keywords = ["Kakashi", "Sasuke", "Raikage", "Asuma"] + random.sample(vocabulary, min(size, len(vocabulary)))
+        keywords = list(dict.fromkeys(keywords))[:size]
+        # words from the tweets run out before 5000, made up ones fill the rest like a long track list would
+        keywords += ["term%d" % i for i in range(size - len(keywords))]
+        matcher = KeywordMatcher(keywords)
+        assert matcher.match_batch(texts[:500]) == per_keyword(texts[:500], keywords)
+        sample = texts if size <= 100 else texts[:num_tweets // 10]  # the slow side takes a while, time fewer
+        naive = best_time(lambda: per_keyword(sample, keywords), repeat=1)
+        fast = best_time(lambda: matcher.match_batch(texts))
+        print("%9d %10d %10.0f tw/s %10.0f tw/s" % (size, num_tweets, len(sample) / naive, len(texts) / fast))
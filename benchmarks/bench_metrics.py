@@ -0,0 +1,47 @@
+# cost of the twitter_metrics timers on the hot paths: without them, switched off and switched on
+# usage: python benchmarks/bench_metrics.py [number of calls per path]
+import os
+import shutil
+import sys
+import tempfile
+
+from bench_common import best_time, load_tweets, scale_to
+from twitter_core import StdOutListener, TwitterAnalyser
+from twitter_metrics import METRICS
+
+
+def report(name, timed, plain, args, repeat=5):
+    METRICS.enabled = False
+    bare = best_time(lambda: [plain(*arg) for arg in args], repeat)
+    off = best_time(lambda: [timed(*arg) for arg in args], repeat)
+    METRICS.enabled = True
+    on = best_time(lambda: [timed(*arg) for arg in args], repeat)
+    METRICS.enabled = False
+    per_call = 1e9 / len(args)
+    print("%-20s %10.0f ns %10.0f ns (%+5.1f%%) %10.0f ns (%+5.1f%%)"
+          % (name, bare * per_call, off * per_call, (off / bare - 1) * 100, on * per_call, (on / bare - 1) * 100))
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tweets = load_tweets()
+    texts = scale_to([tweet['text'] for tweet in tweets], calls)
+    raw = scale_to([(b'{"text": "%d"}' % i) for i in range(len(tweets))], calls)
+    work_dir = tempfile.mkdtemp()
+    try:
+        analyser = TwitterAnalyser()
+        listener = StdOutListener(os.path.join(work_dir, "capture.txt"), "", "", "", "", echo=False)
+        print("%-20s %13s %24s %24s" % ("per call", "no timer", "metrics off", "metrics on"))
+        report("on_data", listener.on_data, lambda data: StdOutListener.on_data.__wrapped__(listener, data),
+               [(data,) for data in raw])
+        report("clean_tweet", analyser.clean_tweet,
+               lambda text: TwitterAnalyser.clean_tweet.__wrapped__(analyser, text), [(text,) for text in texts])
+        few = [(text,) for text in texts[:calls // 20]]  # a TextBlob per call is slow, fewer calls are plenty
+        report("analyse_sentiment", analyser.analyse_sentiment,
+               lambda text: TwitterAnalyser.analyse_sentiment.__wrapped__(analyser, text), few, repeat=3)
+        report("tweet_to_data_frame", analyser.tweet_to_data_frame,
+               lambda batch: TwitterAnalyser.tweet_to_data_frame.__wrapped__(analyser, batch),
+               [(tweets,)] * 200)
+        listener.writer.close()
+    finally:
+        shutil.rmtree(work_dir)
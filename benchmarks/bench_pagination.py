@@ -0,0 +1,49 @@
+# time to first result and peak memory for a 3,200 tweet timeline on the fake API server,
+# fetching everything into a list first (the old getters) against the lazy page iterator
+# usage: python benchmarks/bench_pagination.py [number of tweets]
+import sys
+import time
+import tracemalloc
+
+from tweepy import Cursor
+
+from fake_twitter_api import FakeTwitterAPI
+from twitter_core import TwitterAnalyser, TwitterClient
+
+
+def run(label, frames):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    rows = 0
+    for df in frames:
+        if first is None:
+            first = time.perf_counter() - start
+        rows += len(df)
+    total = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("%-14s %d tweets, first result %.2fs, all done %.2fs, peak memory %.1f MB"
+          % (label, rows, first, total, peak / 1e6))
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 3200
+
+    fake = FakeTwitterAPI(latency=0.05, timeline_length=num_tweets).start()
+    try:
+        twitter_client = TwitterClient('handle')
+        twitter_client.get_twitter_client_api().session.mount('https://', fake.adapter())
+        tweet_analyser = TwitterAnalyser()
+        tweet_analyser.analyse_sentiment_batch(["warm up"])  # load the lexicon before anything is measured
+
+        # the way the getters used to work: default 20 tweet pages, all collected before any analysis
+        def list_then_analyse():
+            api = twitter_client.get_twitter_client_api()
+            tweets = [tweet for tweet in Cursor(api.user_timeline, screen_name='handle').items(num_tweets)]
+            yield tweet_analyser.add_sentiment_column(tweet_analyser.tweet_to_data_frame(tweets))
+
+        run("list getter", list_then_analyse())
+        run("page iterator", tweet_analyser.analyse_pages(twitter_client.iter_user_timeline_pages(num_tweets)))
+    finally:
+        fake.stop()
@@ -0,0 +1,54 @@
+# render time of the layered likes+retweets chart, every point plotted with pandas against twitter_plots
+# usage: python benchmarks/bench_plots.py [largest number of tweets]
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # no display needed, the charts are only saved
+import matplotlib.pyplot as plt
+
+from bench_common import best_time
+from twitter_plots import render_chart
+
+
+# n tweets spread over six months with heavy tailed likes and retweets like real timelines have
+def synthetic_frame(n):
+    rng = np.random.default_rng(0)
+    start = pd.Timestamp('2020-01-01', tz='UTC').value // 10 ** 9
+    return pd.DataFrame({
+        'date': pd.to_datetime(rng.integers(start, start + 180 * 86400, n), unit='s', utc=True),
+        'likes': rng.pareto(1.5, n).astype(np.int64),
+        'retweets': rng.pareto(2.0, n).astype(np.int64),
+    })
+
+
+# what twitter_visualisation.py did before, one series per column over every tweet
+def plot_every_point(df, filename):
+    time_likes = pd.Series(data=df['likes'].values, index=df['date'])
+    time_likes.plot(figsize=(16, 4), label="likes", legend=True)
+    time_retweets = pd.Series(data=df['retweets'].values, index=df['date'])
+    time_retweets.plot(figsize=(16, 4), label="retweets", legend=True)
+    plt.savefig(filename)
+    plt.close('all')
+
+
+if __name__ == "__main__":
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    work_dir = tempfile.mkdtemp()
+    try:
+        sizes = [n for n in (10000, 100000, 1000000, 10000000) if n <= largest]
+        print("%10s %14s %14s %14s" % ("tweets", "every point", "minmax", "resample"))
+        for n in sizes:
+            df = synthetic_frame(n)
+            filename = os.path.join(work_dir, "chart.png")
+            # plotting every point gets slow quickly, it is only timed once
+            naive = best_time(lambda: plot_every_point(df, filename), repeat=1) if n <= 1000000 else None
+            minmax = best_time(lambda: render_chart(filename, df, ['likes', 'retweets'], mode='minmax'))
+            resample = best_time(lambda: render_chart(filename, df, ['likes', 'retweets'], mode='resample'))
+            print("%10d %13s %13.2fs %13.2fs" % (n, "%.2fs" % naive if naive is not None else "-", minmax, resample))
+    finally:
+        shutil.rmtree(work_dir)
@@ -0,0 +1,58 @@
+# reads a large capture file with TweetFileReader and compares it with loading the whole file at once
+# usage: python benchmarks/bench_reader.py [number of tweets in the generated capture]
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench_common import load_tweets, scale_to
+from twitter_reader import TweetFileReader
+
+
+# the old way, every line parsed and kept with the whole payload
+def load_whole_file(path):
+    tweets = []
+    with open(path, encoding='utf-8') as tf:
+        for line in tf.read().splitlines():
+            if line.strip():
+                tweets.append(json.loads(line))
+    return len(tweets)
+
+
+def read_in_chunks(path):
+    count = 0
+    for chunk in TweetFileReader(path).chunks(10000):
+        count += len(chunk)
+    return count
+
+
+def measure(func, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func(path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, elapsed, peak
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+    # write a capture file the way the listeners do, one tweet per line with blank lines between
+    lines = [json.dumps(tweet).encode('utf-8') for tweet in load_tweets()]
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, 'wb') as tf:
+        for line in scale_to(lines, num_tweets):
+            tf.write(line + b"\r\n\r\n")
+    print("capture: %d tweets, %.1f MB" % (num_tweets, os.path.getsize(path) / 1e6))
+
+    try:
+        for name, func in (("whole file", load_whole_file), ("TweetFileReader chunks", read_in_chunks)):
+            count, elapsed, peak = measure(func, path)
+            print("%-24s %d tweets in %.2fs, %.0f tweets/sec, peak memory %.1f MB"
+                  % (name, count, elapsed, count / elapsed, peak / 1e6))
+    finally:
+        os.remove(path)
@@ -0,0 +1,68 @@
+# memory held per tweet by each way of keeping a capture in memory, measured with tracemalloc
+# usage: python benchmarks/bench_records.py [number of tweets in the generated capture]
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from tweepy.models import Status
+
+from bench_common import load_tweets, scale_to
+from twitter_core import TwitterAnalyser
+from twitter_reader import TweetFileReader
+from twitter_record import read_records
+
+
+def statuses(path):
+    return [Status.parse(None, tweet) for tweet in TweetFileReader(path, fields=None)]
+
+
+def full_dicts(path):
+    return list(TweetFileReader(path, fields=None))
+
+
+def field_dicts(path):
+    return list(TweetFileReader(path))
+
+
+def records(path):
+    return list(read_records(path))
+
+
+# memory still held by the list once it is built (the parsing on the way is not counted)
+def measure(load, path):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tweets = load(path)
+    elapsed = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tweets, held, elapsed
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    try:
+        with os.fdopen(fd, 'wb') as tf:
+            for i, tweet in enumerate(scale_to(load_tweets(), num_tweets)):
+                tweet = dict(tweet, id=i)
+                tf.write(json.dumps(tweet).encode('utf-8') + b"\n")
+        print("capture: %d tweets, %.1f MB" % (num_tweets, os.path.getsize(path) / 1e6))
+
+        analyser = TwitterAnalyser()
+        print("%-24s %10s %12s %10s %14s" % ("kept as", "MB", "bytes/tweet", "load", "data frame"))
+        for name, load in (("tweepy Status", statuses), ("full dicts", full_dicts),
+                           ("TWEET_FIELDS dicts", field_dicts), ("TweetRecord", records)):
+            tweets, held, elapsed = measure(load, path)
+            start = time.perf_counter()
+            analyser.tweet_to_data_frame(tweets)
+            frame = time.perf_counter() - start
+            print("%-24s %10.1f %12.0f %9.2fs %13.2fs" % (name, held / 1e6, held / len(tweets), elapsed, frame))
+            del tweets
+    finally:
+        os.remove(path)
@@ -0,0 +1,70 @@
+# daily engagement and sentiment from the rollup store against working it out from the raw capture each time
+# usage: python benchmarks/bench_rollup.py [number of tweets in the generated capture]
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from bench_common import best_time, load_tweets
+from twitter_core import TwitterAnalyser
+from twitter_reader import CREATED_AT_FORMAT, TweetFileReader
+from twitter_rollup import RollupStore
+
+
+# a capture of num_tweets tweets, each copy of tweets.txt moved an hour later so the data covers months
+def write_capture(path, num_tweets):
+    tweets = load_tweets()
+    with open(path, 'wb') as tf:
+        for i in range(num_tweets):
+            tweet = dict(tweets[i % len(tweets)])
+            copy = i // len(tweets)
+            created_at = datetime.strptime(tweet['created_at'], CREATED_AT_FORMAT) + timedelta(hours=copy)
+            tweet['created_at'] = created_at.strftime(CREATED_AT_FORMAT)
+            tweet['timestamp_ms'] = str(int(created_at.timestamp() * 1000))
+            tweet['id'] = i
+            tf.write(json.dumps(tweet).encode('utf-8') + b"\r\n\r\n")
+
+
+# the way it is done today, read everything, build the frame, score it and group by day
+def from_capture(path, analyser):
+    df = analyser.tweet_to_data_frame(TweetFileReader(path))
+    analyser.add_sentiment_column(df)
+    df['day'] = df['date'].dt.floor('D')
+    return df.groupby('day').agg(tweets=('id', 'size'), likes_max=('likes', 'max'),
+                                 retweets_max=('retweets', 'max'), mean_len=('len', 'mean'),
+                                 positive=('sentiment', lambda s: int((s > 0).sum())))
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    work_dir = tempfile.mkdtemp()
+    try:
+        capture = os.path.join(work_dir, "capture.txt")
+        write_capture(capture, num_tweets)
+        analyser = TwitterAnalyser()
+
+        # fill the store the way the pipeline would, a batch of scored tweets at a time
+        store = RollupStore(os.path.join(work_dir, "rollups.db"))
+        start = time.perf_counter()
+        for chunk in TweetFileReader(capture, fields=None).chunks(1000):
+            store.add(chunk, analyser.analyse_polarity_batch([tweet['text'] for tweet in chunk]))
+        ingest = time.perf_counter() - start
+
+        recompute = best_time(lambda: from_capture(capture, analyser), repeat=1)
+        query = best_time(lambda: (store.query(period='day'), store.summary()))
+        days = store.query(period='day')
+        print("capture:        %d tweets, %.1f MB" % (num_tweets, os.path.getsize(capture) / 1e6))
+        print("rollup store:   %.1f KB, %d days, %d handles" % (os.path.getsize(store.path) / 1e3, len(days),
+                                                                  len(store.handles())))
+        print("rollup ingest:  %.0f tweets/sec (including scoring)" % (num_tweets / ingest))
+        print("from capture:   %.3fs" % recompute)
+        print("from rollups:   %.4fs" % query)
+        assert int(np.sum(days['tweets'])) == num_tweets
+        store.close()
+    finally:
+        shutil.rmtree(work_dir)
@@ -0,0 +1,33 @@
+# compares the old per tweet TextBlob scoring with TwitterAnalyser.analyse_sentiment_batch
+# usage: python benchmarks/bench_sentiment.py [number of tweets]
+import sys
+
+import numpy as np
+
+from bench_common import best_time, load_tweets, scale_to
+from twitter_core import TwitterAnalyser
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    tweet_analyser = TwitterAnalyser()
+    texts = scale_to([tweet['text'] for tweet in load_tweets()], num_tweets)
+
+    # both ways must agree on every label before the timings mean anything
+    before = np.array([tweet_analyser.analyse_sentiment(tweet) for tweet in texts])
+    after = tweet_analyser.analyse_sentiment_batch(texts)
+    assert np.array_equal(before, after), "batch labels differ from analyse_sentiment"
+
+    # the captured data repeats a lot (retweets), also time it with every text made unique
+    # so the gain from sharing the lexicon shows up separately from the gain from scoring repeats once
+    unique_texts = ["%s %d" % (tweet, i) for i, tweet in enumerate(texts)]
+
+    print("tweets:              %d" % num_tweets)
+    for name, corpus in (("captured", texts), ("all unique", unique_texts)):
+        per_tweet = best_time(lambda: [tweet_analyser.analyse_sentiment(tweet) for tweet in corpus])
+        batch = best_time(lambda: tweet_analyser.analyse_sentiment_batch(corpus))
+        print("%s texts" % name)
+        print("  analyse_sentiment: %.0f tweets/sec" % (num_tweets / per_tweet))
+        print("  batch:             %.0f tweets/sec" % (num_tweets / batch))
+        print("  speed up:          %.1fx" % (per_tweet / batch))
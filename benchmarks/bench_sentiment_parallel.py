@@ -0,0 +1,36 @@
+# compares serial batch scoring with the process pool mode of TwitterAnalyser
+# usage: python benchmarks/bench_sentiment_parallel.py [number of tweets] [workers]
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from bench_common import best_time, load_tweets, scale_to
+from twitter_core import TwitterAnalyser
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    # every text made unique so the pool has real scoring work to share out
+    texts = ["%s %d" % (tweet, i) for i, tweet in enumerate(scale_to([tweet['text'] for tweet in load_tweets()],
+                                                                       num_tweets))]
+    df = pd.DataFrame(data=texts, columns=['tweets'])
+
+    serial_analyser = TwitterAnalyser()
+    parallel_analyser = TwitterAnalyser(workers=workers)
+
+    serial = serial_analyser.add_sentiment_column(df.copy())['sentiment'].values
+    parallel = parallel_analyser.add_sentiment_column(df.copy())['sentiment'].values  # also warms up the pool
+    assert np.array_equal(serial, parallel), "parallel labels differ from serial labels"
+
+    serial_time = best_time(lambda: serial_analyser.add_sentiment_column(df.copy()))
+    parallel_time = best_time(lambda: parallel_analyser.add_sentiment_column(df.copy()))
+    parallel_analyser.close()
+
+    print("tweets:    %d" % num_tweets)
+    print("serial:    %.0f tweets/sec" % (num_tweets / serial_time))
+    print("%d workers: %.0f tweets/sec" % (workers, num_tweets / parallel_time))
+    print("speed up:  %.1fx" % (serial_time / parallel_time))
@@ -0,0 +1,72 @@
+# reading one hour out of a long capture: scanning a single tweets.txt against the sharded capture's index
+# usage: python benchmarks/bench_shards.py [number of tweets in the generated capture]
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from bench_common import best_time, load_tweets
+from twitter_reader import TweetFileReader
+from twitter_shards import ShardedWriter, ShardReader
+
+START_MS = 1600000000000
+SPACING_MS = 1000  # one tweet a second
+
+
+# the same tweets as single file lines and as raw messages for the sharded writer, a second apart
+def make_messages(num_tweets):
+    tweets = load_tweets()
+    for i in range(num_tweets):
+        tweet = dict(tweets[i % len(tweets)])
+        tweet['id'] = i
+        tweet['timestamp_ms'] = str(START_MS + i * SPACING_MS)
+        yield json.dumps(tweet, separators=(',', ':')).encode('utf-8')
+
+
+# the whole file has to be read and parsed to find the tweets in the window
+def scan_single_file(path, start_ms, end_ms):
+    count = 0
+    for tweet in TweetFileReader(path, fields=None):
+        if start_ms <= int(tweet['timestamp_ms']) < end_ms:
+            count += 1
+    return count
+
+
+def read_window(directory, start_ms, end_ms):
+    return sum(1 for _ in ShardReader(directory, start=start_ms / 1000, end=end_ms / 1000))
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    work_dir = tempfile.mkdtemp()
+    try:
+        single = os.path.join(work_dir, "tweets.txt")
+        with open(single, 'wb') as tf:
+            for message in make_messages(num_tweets):
+                tf.write(message + b"\n")
+
+        for compress in (False, True):
+            directory = os.path.join(work_dir, "shards-gz" if compress else "shards")
+            start = time.perf_counter()
+            with ShardedWriter(directory, max_bytes=32 * 1024 * 1024, compress=compress) as writer:
+                for message in make_messages(num_tweets):
+                    writer.write(message)
+            elapsed = time.perf_counter() - start
+            size = sum(os.path.getsize(path) for path in writer.shards_written)
+            print("%-9s %d shards, %.1f MB, written at %.0f tweets/sec"
+                  % ("gzip" if compress else "plain", len(writer.shards_written), size / 1e6, num_tweets / elapsed))
+
+        # an hour from the middle of the capture
+        start_ms = START_MS + (num_tweets // 2) * SPACING_MS
+        end_ms = start_ms + 60 * 60 * 1000
+        expected = scan_single_file(single, start_ms, end_ms)
+        print("single file %.1f MB, %d tweets in the hour" % (os.path.getsize(single) / 1e6, expected))
+        print("scan tweets.txt:   %.3fs" % best_time(lambda: scan_single_file(single, start_ms, end_ms), repeat=1))
+        for name in ("shards", "shards-gz"):
+            directory = os.path.join(work_dir, name)
+            assert read_window(directory, start_ms, end_ms) == expected
+            print("read %-13s %.3fs" % (name + ":", best_time(lambda: read_window(directory, start_ms, end_ms))))
+    finally:
+        shutil.rmtree(work_dir)
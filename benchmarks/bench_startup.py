@@ -0,0 +1,48 @@
+# cold start time of each script, measured by importing it in a fresh python process
+# also shows which of the heavy libraries each one pulls in just by being imported
+# usage: python benchmarks/bench_startup.py [runs per entry point]
+import os
+import subprocess
+import sys
+
+from bench_common import PROJECT_ROOT
+
+ENTRY_POINTS = ['twitter_stream', 'twitter_sentiments', 'twitter_analysis', 'twitter_visualisation', 'twitter_core',
+                'twitter_pipeline', 'twitter_server']
+HEAVY_MODULES = ['tweepy', 'numpy', 'pandas', 'textblob', 'matplotlib', 'pyarrow']
+
+# imports the module in a fresh interpreter and prints the seconds it took and the heavy modules it loaded
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import %s
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(','.join(name for name in %r if name in sys.modules))
+"""
+
+
+def cold_start(module):
+    # matplotlib picks a backend when pyplot is imported, Agg keeps it from looking for a display
+    env = dict(os.environ, MPLBACKEND='Agg')
+    result = subprocess.run([sys.executable, '-c', PROBE % (module, HEAVY_MODULES)], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    elapsed, loaded = result.stdout.split('\n')[:2]
+    return float(elapsed), loaded.split(',') if loaded else []
+
+
+def report(module, runs):
+    times = []
+    loaded = []
+    for _ in range(runs):
+        elapsed, loaded = cold_start(module)
+        times.append(elapsed)
+    times.sort()
+    print("%-22s %7.0f ms   %s" % (module, times[len(times) // 2] * 1000, ' '.join(loaded) or '-'))
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("%-22s %10s   %s" % ("entry point", "median", "heavy modules loaded"))
+    for module in ENTRY_POINTS:
+        report(module, runs)
@@ -0,0 +1,44 @@
+# a full timeline fetch against a re-run of TimelineSync on the fake API server
+# usage: python benchmarks/bench_sync.py [timeline length] [new tweets between runs]
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from tweepy import Cursor
+
+from fake_twitter_api import FakeTwitterAPI
+from twitter_sync import CheckpointStore, TimelineSync
+
+
+if __name__ == "__main__":
+    timeline_length = int(sys.argv[1]) if len(sys.argv) > 1 else 3200
+    new_tweets = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    fake = FakeTwitterAPI(latency=0.05, timeline_length=timeline_length).start()
+    work_dir = tempfile.mkdtemp()
+    try:
+        api = fake.api()
+        api.session.mount('https://', fake.adapter())
+        checkpoints = CheckpointStore(os.path.join(work_dir, "checkpoints.db"))
+        timeline_sync = TimelineSync(api, checkpoints, os.path.join(work_dir, "timelines"))
+
+        timeline_sync.sync('handle')  # the first run has to fetch everything
+        fake.timeline_length += new_tweets  # the handle tweets some more
+
+        fake.requests = 0
+        start = time.perf_counter()
+        list(Cursor(api.user_timeline, screen_name='handle', count=200).items(timeline_length + new_tweets))
+        print("full refetch: %d requests, %.2fs" % (fake.requests, time.perf_counter() - start))
+
+        fake.requests = 0
+        start = time.perf_counter()
+        fetched = timeline_sync.sync('handle')
+        print("sync re-run:  %d requests, %.2fs, %d new tweets" % (fake.requests, time.perf_counter() - start,
+                                                                   len(fetched)))
+        assert len(timeline_sync.load('handle')) == timeline_length + new_tweets
+        checkpoints.close()
+    finally:
+        fake.stop()
+        shutil.rmtree(work_dir)
@@ -0,0 +1,101 @@
+# "most engaging positive tweets in the last hour" asked every 1000 tweets of a stream: building a frame of
+# what has arrived and taking the largest against TopTweets kept up to date as the tweets come in
+# usage: python benchmarks/bench_topk.py [number of tweets]
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_common import load_tweets, scale_to
+from twitter_core import TwitterAnalyser
+from twitter_topk import TopTweets
+
+QUERY_EVERY = 1000
+
+
+# the captured tweets as a stream a few hours long, ten a second, each retweet bringing its original in
+# with counts that keep growing the way they do while a tweet goes round
+def stream(num_tweets):
+    random.seed(0)
+    captured = load_tweets()
+    start = 1657566917.0
+    counts = {}
+    tweets = []
+    for i, tweet in enumerate(scale_to(captured, num_tweets)):
+        tweet = dict(tweet, id=i, timestamp_ms=str(int((start + i / 10.0) * 1000)))
+        original = tweet.get('retweeted_status')
+        if original is not None:
+            # every 50 copies of tweets.txt retweet different originals, so new ones keep showing up
+            original_id = original['id'] * 1000 + i // (len(captured) * 50)
+            likes, retweets = counts.get(original_id, (0, 0))
+            likes += random.randint(0, 40)
+            retweets += random.randint(0, 10)
+            counts[original_id] = (likes, retweets)
+            tweet['retweeted_status'] = dict(original, id=original_id, favorite_count=likes, retweet_count=retweets)
+        else:
+            tweet['favorite_count'] = random.randint(0, 50)
+        tweets.append(tweet)
+    return tweets
+
+
+# the top 10 positive tweets of the last hour out of everything so far, the way it would be done with frames
+def frame_top(rows, now):
+    df = pd.DataFrame(rows, columns=['id', 'score', 'polarity', 'second'])
+    first = (int(now // 60) - 59) * 60  # the same hour TopTweets covers, 60 one minute slots
+    recent = df[(df['second'] >= first) & (df['polarity'] > 0)]
+    return recent.groupby('id')['score'].max().nlargest(10).tolist()
+
+
+# (answers, seconds spent answering, seconds for the last answer)
+# the rows are kept as they come and a frame is built for every query
+def with_frames(tweets, polarity):
+    rows = []
+    answers = []
+    querying = last = 0.0
+    for i, (tweet, tweet_polarity) in enumerate(zip(tweets, polarity)):
+        original = tweet.get('retweeted_status') or tweet
+        second = int(tweet['timestamp_ms']) / 1000.0
+        rows.append((original['id'], original['favorite_count'] + original['retweet_count'], tweet_polarity, second))
+        if (i + 1) % QUERY_EVERY == 0:
+            start = time.perf_counter()
+            answers.append(frame_top(rows, second))
+            last = time.perf_counter() - start
+            querying += last
+    return answers, querying, last
+
+
+# (answers, seconds spent adding tweets, seconds spent answering)
+def with_top_tweets(tweets, polarity):
+    top = TopTweets(k=10)
+    answers = []
+    adding = querying = 0.0
+    for i in range(0, len(tweets) - QUERY_EVERY + 1, QUERY_EVERY):
+        start = time.perf_counter()
+        top(tweets[i:i + QUERY_EVERY], polarity[i:i + QUERY_EVERY])
+        adding += time.perf_counter() - start
+        now = int(tweets[i + QUERY_EVERY - 1]['timestamp_ms']) / 1000.0
+        start = time.perf_counter()
+        answers.append([entry['score'] for entry in top.top('*', '1h', 'positive', now)])
+        querying += time.perf_counter() - start
+    return answers, adding, querying
+
+
+if __name__ == "__main__":
+    num_tweets = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    num_tweets -= num_tweets % QUERY_EVERY
+    tweets = stream(num_tweets)
+    polarity = TwitterAnalyser().analyse_polarity_batch([tweet['text'] for tweet in tweets]).tolist()
+
+    expected, frame_queries, frame_last = with_frames(tweets, polarity)
+    answers, adding, queries = with_top_tweets(tweets, polarity)
+    assert answers == expected, "TopTweets disagrees with the frames"
+
+    num_queries = len(answers)
+    print("tweets:          %d, a query every %d" % (num_tweets, QUERY_EVERY))
+    print("frame:           %.1f ms a query on average, %.1f ms for the last one" % (
+        frame_queries / num_queries * 1000, frame_last * 1000))
+    print("TopTweets:       %.2f ms a query, %.1f us to add a tweet" % (
+        queries / num_queries * 1000, adding / num_tweets * 1e6))
+    print("latest answer:   %s" % np.array(answers[-1]))
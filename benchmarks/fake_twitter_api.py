@@ -0,0 +1,138 @@
+# a local stand in for the Twitter v1.1 REST API, for trying the fetchers without credentials
+# serves user timelines (max_id paging) and friend lists (cursor paging) made from the tweets in tweets.txt,
+# with a fixed delay per request and per endpoint rate limits sent back in the x-rate-limit headers
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from tweepy import API, OAuthHandler
+
+from bench_common import load_tweets
+from twitter_fetcher import RateLimitedAdapter
+from twitter_reader import TWEET_FIELDS
+
+
+class FakeTwitterAPI():
+    # latency is the delay added to every request in seconds
+    # rate_limit is requests per endpoint per window before 429s come back (None for no limit)
+    def __init__(self, latency=0.05, timeline_length=3200, rate_limit=None, window=900):
+        self.latency = latency
+        self.timeline_length = timeline_length
+        self.rate_limit = rate_limit
+        self.window = window
+        self.requests = 0
+        self.rejected = 0
+        # only the fields the project reads, so building and parsing pages does not drown out the latency
+        self._templates = [dict({field: tweet[field] for field in TWEET_FIELDS},
+                                user={'id': tweet['user']['id'], 'screen_name': tweet['user']['screen_name']})
+                           for tweet in load_tweets()]
+        self._counts = {}  # endpoint -> (window start, requests)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # a tweepy API pointed at this server, requests go through adapter (a RateLimitedAdapter by default)
+    def api(self):
+        auth = OAuthHandler("key", "secret")
+        auth.set_access_token("token", "token secret")
+        return API(auth)
+
+    def adapter(self, limits=None, **kwargs):
+        return RedirectAdapter(self.url, limits=limits if limits is not None else {}, **kwargs)
+
+    # (status, headers, body) for one request
+    def respond(self, path, query):
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            now = time.time()
+            start, count = self._counts.get(path, (now, 0))
+            if now - start >= self.window:
+                start, count = now, 0
+            count += 1
+            self._counts[path] = (start, count)
+            headers = {}
+            if self.rate_limit is not None:
+                headers = {'x-rate-limit-limit': str(self.rate_limit),
+                           'x-rate-limit-remaining': str(max(0, self.rate_limit - count)),
+                           'x-rate-limit-reset': str(int(start + self.window))}
+                if count > self.rate_limit:
+                    self.rejected += 1
+                    return 429, headers, {'errors': [{'code': 88, 'message': "Rate limit exceeded"}]}
+
+        handle = query.get('screen_name', ['someone'])[0]
+        page_size = int(query.get('count', ['20'])[0])
+        if path == '/1.1/statuses/user_timeline.json':
+            return 200, headers, self._timeline_page(handle, page_size, query.get('max_id', [None])[0],
+                                                     query.get('since_id', [None])[0])
+        if path == '/1.1/friends/list.json':
+            return 200, headers, self._friends_page(handle, page_size, int(query.get('cursor', ['-1'])[0]))
+        return 404, headers, {'errors': [{'code': 34, 'message': "Sorry, that page does not exist"}]}
+
+    # newest first, ids count down from the top of the handle's timeline
+    # raise timeline_length to make new tweets appear on every timeline
+    def _timeline_page(self, handle, page_size, max_id, since_id):
+        top = 10 ** 12 + self.timeline_length
+        first = top if max_id is None else int(max_id)
+        last = max(10 ** 12 if since_id is None else int(since_id), first - page_size)
+        tweets = []
+        for tweet_id in range(first, last, -1):
+            template = self._templates[tweet_id % len(self._templates)]
+            tweets.append(dict(template, id=tweet_id, id_str=str(tweet_id),
+                               user=dict(template['user'], screen_name=handle)))
+        return tweets
+
+    def _friends_page(self, handle, page_size, cursor):
+        start = 0 if cursor == -1 else cursor
+        end = min(start + page_size, self.timeline_length // 10)
+        users = [dict(self._templates[i % len(self._templates)]['user'], id=i, screen_name="%s_friend_%d" % (handle, i))
+                 for i in range(start, end)]
+        return {'users': users, 'next_cursor': end if end < self.timeline_length // 10 else 0,
+                'previous_cursor': 0}
+
+
+# sends the https://api.twitter.com requests tweepy makes to the fake server instead
+class RedirectAdapter(RateLimitedAdapter):
+    def __init__(self, base_url, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        request.url = self.base_url + request.url[len('https://api.twitter.com'):]
+        return super().send(request, **kwargs)
+
+
+def _handler_for(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            status, headers, body = fake.respond(url.path, parse_qs(url.query))
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass  # keep the benchmark output readable
+
+    return Handler
@@ -0,0 +1,68 @@
+# load test for twitter_server.py on localhost
+# usage: python benchmarks/load_test_server.py [url] [clients] [requests per client] [texts per request]
+# with no url a server is started in this process on a free port
+import json
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+from urllib.parse import urlparse
+
+import numpy as np
+
+from bench_common import load_tweets
+from twitter_server import SentimentServer
+
+
+def client(url, bodies, latencies):
+    address = urlparse(url)
+    connection = HTTPConnection(address.hostname, address.port)
+    for body in bodies:
+        start = time.perf_counter()
+        connection.request('POST', '/sentiment', body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 200, response.status
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+if __name__ == "__main__":
+    url = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] != '-' else None
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    requests_per_client = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    texts_per_request = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+
+    sentiment_server = None
+    if url is None:
+        sentiment_server = SentimentServer(port=0).start()
+        url = sentiment_server.url
+
+    # every text is different so the server really has to score it
+    texts = [tweet['text'] for tweet in load_tweets()]
+    counter = iter(range(10 ** 9))
+    bodies = [[json.dumps({'texts': ["%s %d" % (texts[i % len(texts)], next(counter))
+                                     for i in range(texts_per_request)]})
+               for _ in range(requests_per_client)] for _ in range(clients)]
+
+    latencies = []
+    threads = [threading.Thread(target=client, args=(url, client_bodies, latencies)) for client_bodies in bodies]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) * 1000.0
+    total_texts = clients * requests_per_client * texts_per_request
+    print("%d clients x %d requests x %d texts against %s" % (clients, requests_per_client, texts_per_request, url))
+    print("client side: p50 %.1f ms, p99 %.1f ms, %.0f requests/sec, %.0f texts/sec"
+          % (np.percentile(latencies, 50), np.percentile(latencies, 99), len(latencies) / elapsed,
+             total_texts / elapsed))
+    connection = HTTPConnection(urlparse(url).hostname, urlparse(url).port)
+    connection.request('GET', '/metrics')
+    print("server /metrics:", connection.getresponse().read().decode('utf-8'))
+
+    if sentiment_server is not None:
+        sentiment_server.stop()
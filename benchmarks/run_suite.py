@@ -0,0 +1,153 @@
+# throughput benchmark suite, results are written as JSON so runs on different versions can be compared
+# usage: python benchmarks/run_suite.py [--quick] [--output results.json] [--compare older_results.json]
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from tweepy.models import Status
+
+from bench_common import PROJECT_ROOT, TWEETS_FILE, best_time, load_tweets, scale_to
+from twitter_core import StdOutListener, TwitterAnalyser
+from twitter_pipeline import IngestPipeline
+from twitter_reader import TWEET_FIELDS
+from twitter_replay import CaptureReplayer, replaying
+
+
+# each case returns (items processed, seconds)
+def bench_clean_tweet(texts, analyser):
+    return len(texts), best_time(lambda: [analyser.clean_tweet(text) for text in texts])
+
+
+def bench_analyse_sentiment(texts, analyser):
+    texts = texts[:len(texts) // 10]  # one TextBlob per tweet is slow, a tenth is plenty to time
+    return len(texts), best_time(lambda: [analyser.analyse_sentiment(text) for text in texts])
+
+
+def bench_analyse_sentiment_batch(texts, analyser):
+    return len(texts), best_time(lambda: analyser.analyse_sentiment_batch(texts))
+
+
+def bench_tweet_to_data_frame_status(statuses, analyser):
+    return len(statuses), best_time(lambda: analyser.tweet_to_data_frame(statuses))
+
+
+def bench_tweet_to_data_frame_dicts(records, analyser):
+    return len(records), best_time(lambda: analyser.tweet_to_data_frame(records))
+
+
+# StdOutListener.on_data and its TweetWriter, fed by the replay harness as fast as it will go
+def bench_listener_writer(work_dir, loops):
+    listener_class = replaying(StdOutListener, TWEETS_FILE, loops=loops)
+    listener = listener_class(os.path.join(work_dir, "listener.txt"), "", "", "", "", echo=False)
+    result = listener.filter()
+    start = time.perf_counter()
+    listener.writer.close()
+    return result['messages'], result['seconds'] + time.perf_counter() - start
+
+
+# on_data into the ingest pipeline, timed until every tweet is parsed, scored and written
+def bench_pipeline(work_dir, loops):
+    pipeline = IngestPipeline(os.path.join(work_dir, "pipeline.txt"), workers=2)
+
+    class Listener():
+        def on_data(self, raw_data):
+            pipeline.put(raw_data)
+            return True
+
+    start = time.perf_counter()
+    result = CaptureReplayer(TWEETS_FILE, loops=loops).replay(Listener())
+    pipeline.stop()
+    return result['messages'], time.perf_counter() - start
+
+
+def git_version():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=PROJECT_ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(quick):
+    size = 20000 if quick else 200000
+    loops = 100 if quick else 1000
+
+    analyser = TwitterAnalyser()
+    captured = load_tweets()
+    texts = ["%s %d" % (text, i) for i, text in enumerate(scale_to([tweet['text'] for tweet in captured], size))]
+    statuses = scale_to([Status.parse(None, tweet) for tweet in captured], size)
+    records = scale_to([{field: tweet[field] for field in TWEET_FIELDS} for tweet in captured], size)
+    analyser.analyse_sentiment_batch(["warm up"])  # the lexicon load is not what is being timed
+
+    work_dir = tempfile.mkdtemp()
+    cases = [
+        ('clean_tweet', lambda: bench_clean_tweet(texts, analyser)),
+        ('analyse_sentiment', lambda: bench_analyse_sentiment(texts, analyser)),
+        ('analyse_sentiment_batch', lambda: bench_analyse_sentiment_batch(texts, analyser)),
+        ('tweet_to_data_frame_status', lambda: bench_tweet_to_data_frame_status(statuses, analyser)),
+        ('tweet_to_data_frame_dicts', lambda: bench_tweet_to_data_frame_dicts(records, analyser)),
+        ('listener_writer', lambda: bench_listener_writer(work_dir, loops)),
+        ('ingest_pipeline', lambda: bench_pipeline(work_dir, loops // 10)),
+    ]
+    results = {}
+    try:
+        for name, case in cases:
+            items, seconds = case()
+            results[name] = {'items': items, 'seconds': seconds, 'items_per_sec': items / seconds}
+            print("%-28s %12.0f items/sec" % (name, items / seconds))
+    finally:
+        shutil.rmtree(work_dir)
+    return results
+
+
+# prints the change for each case and returns the names of the ones that got slower than threshold
+def compare(results, baseline, threshold):
+    regressions = []
+    print("\ncompared with %s (%s)" % (baseline['version'], baseline['created']))
+    for name, result in results.items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['items_per_sec']
+        change = result['items_per_sec'] / before - 1.0
+        flag = ""
+        if change < -threshold:
+            flag = "  <-- regression"
+            regressions.append(name)
+        print("%-28s %+7.1f%%%s" % (name, change * 100, flag))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quick', action='store_true', help="smaller inputs, for a fast check")
+    parser.add_argument('--output', help="where to write the results (default benchmarks/results/<version>.json)")
+    parser.add_argument('--compare', help="results file from an earlier run to compare with")
+    parser.add_argument('--threshold', type=float, default=0.10, help="slow down that counts as a regression")
+    args = parser.parse_args()
+
+    version = git_version()
+    report = {
+        'version': version,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'results': run(args.quick),
+    }
+
+    output = args.output or os.path.join(PROJECT_ROOT, "benchmarks", "results", "%s.json" % version)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as rf:
+        json.dump(report, rf, indent=2)
+    print("results written to %s" % output)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as rf:
+            if compare(report['results'], json.load(rf), args.threshold):
+                sys.exit(1)
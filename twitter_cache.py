@@ -0,0 +1,130 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Cache of sentiment scores so retweets and repeated text are only scored once.
+# Entries are keyed by a hash of the cleaned tweet text, so "RT @a: hello" and "RT @b: hello"
+# share one entry. The most recently used entries are kept in memory and, when a path is given,
+# every score is also kept in a sqlite file so the cache survives restarts.
+
+
+# part of every key, change it when the cleaner or the scoring changes so old stored scores are not reused
+CACHE_VERSION = b'sentiment-v1'
+
+
+def text_key(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16, person=CACHE_VERSION).digest()
+
+
+class SentimentCache():
+    # max_entries is how many scores are kept in memory, path is the sqlite file (None keeps it in memory only)
+    def __init__(self, max_entries=100000, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()  # key -> polarity, oldest first
+        self._lock = threading.Lock()  # the stream consumers share one cache
+
+        # counters for sizing the cache
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS sentiment (key BLOB PRIMARY KEY, polarity REAL NOT NULL)")
+            self._db.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # polarity for a key or None if it has never been scored
+    def get(self, key):
+        with self._lock:
+            return self._get(key)
+
+    def put(self, key, polarity):
+        with self._lock:
+            self._remember(key, polarity)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO sentiment VALUES (?, ?)", (key, polarity))
+                self._db.commit()
+
+    # polarity for each cleaned text, only the texts never seen before are passed to score
+    # score takes a list of texts and returns an array of polarity in the same order
+    # a text repeated in the batch is looked up (and counted as a hit or miss) once
+    def get_or_score(self, texts, score):
+        polarity = np.empty(len(texts), dtype=np.float64)
+        positions = {}  # key -> positions of the texts with that key
+        for i, text in enumerate(texts):
+            positions.setdefault(text_key(text), []).append(i)
+        missing = {}  # the same for the keys that have never been scored
+        with self._lock:
+            for key, key_positions in positions.items():
+                value = self._get(key)
+                if value is None:
+                    missing[key] = key_positions
+                else:
+                    polarity[key_positions] = value
+
+        if missing:
+            keys = list(missing)
+            scores = score([texts[missing[key][0]] for key in keys])
+            with self._lock:
+                for key, value in zip(keys, scores):
+                    polarity[missing[key]] = value
+                    self._remember(key, float(value))
+                if self._db is not None:
+                    # one transaction for the whole batch
+                    self._db.executemany("INSERT OR REPLACE INTO sentiment VALUES (?, ?)",
+                                         [(key, float(value)) for key, value in zip(keys, scores)])
+                    self._db.commit()
+        return polarity
+
+    # the counters as a dict, hit_rate counts memory and disk hits
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # the methods below expect the lock to be held
+    def _get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        if self._db is not None:
+            row = self._db.execute("SELECT polarity FROM sentiment WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+
+        self.misses += 1
+        return None
+
+    def _remember(self, key, polarity):
+        self._entries[key] = polarity
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
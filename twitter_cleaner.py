@@ -0,0 +1,39 @@
+import html
+import re
+
+
+# Cleaning tweets before they are scored for sentiment.
+# The old pattern in TwitterAnalyser.clean_tweet had "[\w+:\/\/\s+]" as its last group which matches
+# every letter, digit and space, so only the punctuation was left behind for TextBlob to score.
+# This cleaner removes what was meant to go: mentions, links and punctuation. Each is replaced with a space,
+# not deleted, so "good...bad" stays two words, and letters of every language are kept ("café" stays
+# "café"). Twitter sends &, < and > as html entities, those are turned back first so "&amp;" isn't "amp".
+
+
+# one pattern for all three so each tweet is scanned once, links come first so "https://t.co/x" goes as a whole
+CLEAN_PATTERN = re.compile(r"(\w+://\S+)|(@\w+)|([^\w\s])")
+
+# for plain ascii tweets with no mention or link, replacing punctuation with str.translate is much cheaper than
+# a regex; the table maps the same ascii characters the pattern's last group matches to a space
+ASCII_PUNCTUATION = str.maketrans({c: ' ' for c in map(chr, range(128))
+                                   if not (c.isalnum() or c.isspace() or c == '_')})
+
+
+class TweetCleaner():
+    def __init__(self, pattern=CLEAN_PATTERN):
+        self.pattern = pattern
+
+    # remove mentions, links and punctuation and squash the spaces left behind
+    def clean(self, tweet):
+        if '&' in tweet:
+            tweet = html.unescape(tweet)
+        if tweet.isascii() and '@' not in tweet and '://' not in tweet:
+            return ' '.join(tweet.translate(ASCII_PUNCTUATION).split())
+        return ' '.join(self.pattern.sub(' ', tweet).split())
+
+    # clean a list of tweets or a pandas Series (the Series keeps its index)
+    def clean_batch(self, tweets):
+        clean = self.clean
+        if hasattr(tweets, 'map'):
+            return tweets.map(clean)
+        return [clean(tweet) for tweet in tweets]
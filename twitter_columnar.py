@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from twitter_reader import CREATED_AT_FORMAT, source_name
+
+
+# Columnar capture files (Parquet) as an alternative to raw JSON lines.
+# Every raw tweet carries the whole user object, colours, image links and so on, but the analysis only
+# uses the columns TwitterAnalyser.tweet_to_data_frame builds. ColumnarWriter keeps just those plus the
+# sentiment and writes them in rolling parquet files, load_columnar reads them back as that data frame.
+
+
+class ColumnarWriter():
+    # a new file is written every rows_per_file tweets or seconds_per_file seconds, whichever comes first
+    # add() takes the same (tweets, polarity) arguments as an IngestPipeline handler so it can be passed as one
+    def __init__(self, directory, rows_per_file=50000, seconds_per_file=600, prefix='tweets',
+                 compression='zstd'):
+        self.directory = directory
+        self.rows_per_file = rows_per_file
+        self.seconds_per_file = seconds_per_file
+        self.prefix = prefix
+        self.compression = compression
+        self.files_written = []
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()  # the pipeline's consumer threads all add to the same writer
+        self._reset()
+
+    def add(self, tweets, polarity):
+        with self._lock:
+            for tweet in tweets:
+                self._texts.append(tweet['text'])
+                self._ids.append(tweet['id'])
+                self._dates.append(tweet['created_at'])
+                self._sources.append(source_name(tweet['source']))
+                self._likes.append(tweet['favorite_count'])
+                self._retweets.append(tweet['retweet_count'])
+            self._polarity.append(np.asarray(polarity, dtype=np.float64))
+            if (len(self._texts) >= self.rows_per_file or
+                    time.monotonic() - self._started >= self.seconds_per_file):
+                self._write()
+
+    def __call__(self, tweets, polarity):
+        self.add(tweets, polarity)
+
+    # write out whatever is buffered
+    def close(self):
+        with self._lock:
+            self._write()
+
+    def _reset(self):
+        self._texts, self._ids, self._dates, self._sources = [], [], [], []
+        self._likes, self._retweets, self._polarity = [], [], []
+        self._started = time.monotonic()
+
+    def _write(self):
+        if not self._texts:
+            return
+        polarity = np.concatenate(self._polarity)
+        table = pa.table({
+            'tweets': pa.array(self._texts, pa.string()),
+            'id': pa.array(self._ids, pa.int64()),
+            'len': pa.array([len(text) for text in self._texts], pa.int32()),
+            'date': pa.array(pd.to_datetime(self._dates, format=CREATED_AT_FORMAT, utc=True)),
+            'source': pa.array(self._sources, pa.string()).dictionary_encode(),
+            'likes': pa.array(self._likes, pa.int64()),
+            'retweets': pa.array(self._retweets, pa.int64()),
+            'sentiment': pa.array(np.sign(polarity).astype(np.int8)),
+        })
+        # the time in the name keeps files from different runs apart and in order
+        filename = os.path.join(self.directory, "%s-%s-%05d.parquet"
+                                % (self.prefix, time.strftime('%Y%m%d-%H%M%S'), len(self.files_written)))
+        pq.write_table(table, filename, compression=self.compression)
+        self.files_written.append(filename)
+        self._reset()
+
+
+# read a columnar capture (one file or a whole directory) back into the tweet_to_data_frame layout
+# columns picks which columns to read, the others are never loaded from disk
+def load_columnar(path, columns=None):
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.parquet'))
+    else:
+        files = [path]
+    if not files:
+        return pd.DataFrame(columns=columns)
+    tables = [pq.read_table(filename, columns=columns) for filename in files]
+    # the source dictionaries differ from file to file, unify them so they concatenate as one categorical
+    return pa.concat_tables(tables, promote_options='permissive').unify_dictionaries().to_pandas()
@@ -0,0 +1,394 @@
+# the classes shared by all the scripts (twitter_sentiments, twitter_analysis, twitter_visualisation, twitter_stream)
+# only tweepy and the small project modules are imported here, numpy, pandas and textblob take most of a second
+# to load so they are imported inside the methods that use them, streaming tweets to a file never loads them
+import types
+
+from tweepy import Stream
+from tweepy import API
+from tweepy import Cursor
+from tweepy import OAuthHandler
+
+import twitter_cred
+from twitter_writer import TweetWriter
+from twitter_cleaner import TweetCleaner
+from twitter_metrics import METRICS
+
+
+# Twitter Client
+class TwitterClient():
+    # compact hands back twitter_record.TweetRecord objects instead of full Status objects from the tweet getters,
+    # a small fraction of the memory and still fine for tweet_to_data_frame
+    def __init__(self, twitter_user=None, compact=False):  # None is default and used if no user is specified
+        self.auth = TwitterAuthenticator().authenticate_twitter_app()  # object to properly authenticate app
+        self.twitter_client = API(self.auth)  # passing the authenticator to the API to be checked there
+
+        self.twitter_user = twitter_user  # this allows anyone that wants to use code to specify the Twitter user
+        self.compact = compact
+
+    # function to interact with api and extract data from the tweets
+    def get_twitter_client_api(self):
+        return self.twitter_client
+
+
+    # to get the tweets (num_tweets is for amount of tweets wanted to show)
+    # loop through tweets a certain number of tweets and store each into the list
+    # from the API there is a user_timeline method which allows you to get the tweets from timeline
+    # .item is a method from cursor to help specify the number of tweets we want, we add num_tweets to for that
+    # id would be for telling who the Twitter user is
+
+
+    def get_user_timeline_tweets(self, num_tweets):
+        return list(self.iter_user_timeline_tweets(num_tweets))
+
+    # play around with the others and understand how they work
+    # get list of friends
+    def get_friend_list(self, num_friends):
+        return list(self.iter_friend_list(num_friends))
+
+    # get the top tweets on home timeline
+    def get_home_timeline_tweets(self, num_tweets):
+        return list(self.iter_home_timeline_tweets(num_tweets))
+
+    # lazy versions of the getters above, each tweet (or page of up to 200) is handed over as soon as it arrives
+    # so nothing has to wait for the last page and only the current page is held in memory
+    # tweepy 4 ignores id= (it warns "Unexpected parameter: id"), the user is picked with screen_name
+    def iter_user_timeline_tweets(self, num_tweets):
+        return self._tweets(Cursor(self._timed_api('user_timeline'), count=PAGE_SIZE,
+                                   **self._user()).items(num_tweets))
+
+    def iter_user_timeline_pages(self, num_tweets):
+        return self._pages(_pages(Cursor(self._timed_api('user_timeline'), count=PAGE_SIZE, **self._user()),
+                                  num_tweets))
+
+    def iter_friend_list(self, num_friends):
+        return Cursor(self._timed_api('get_friends'), count=PAGE_SIZE, **self._user()).items(num_friends)
+
+    def iter_home_timeline_tweets(self, num_tweets):
+        return self._tweets(Cursor(self._timed_api('home_timeline'), count=PAGE_SIZE).items(num_tweets))
+
+    def iter_home_timeline_pages(self, num_tweets):
+        return self._pages(_pages(Cursor(self._timed_api('home_timeline'), count=PAGE_SIZE), num_tweets))
+
+    # the tweets or pages as they are, or as TweetRecords in compact mode
+    def _tweets(self, statuses):
+        if not self.compact:
+            return statuses
+        from twitter_record import TweetRecord
+
+        return map(TweetRecord.from_status, statuses)
+
+    def _pages(self, pages):
+        if not self.compact:
+            return pages
+        from twitter_record import to_records
+
+        return map(to_records, pages)
+
+    # the API method with each page request timed in twitter_api_seconds{endpoint=...}
+    # Cursor reads __self__ (the API) as well as pagination_mode and payload_type off the method, so the
+    # underlying function is timed and bound back to the API rather than replacing the bound method
+    def _timed_api(self, endpoint):
+        method = getattr(self.twitter_client, endpoint)
+        timed = METRICS.timed('twitter_api_seconds', "time per Twitter API page request",
+                              endpoint=endpoint)(method.__func__)
+        return types.MethodType(timed, self.twitter_client)
+
+    # which user the timeline and friends calls ask for (the home timeline is always the authenticated account's)
+    def _user(self):
+        return {'screen_name': self.twitter_user} if self.twitter_user is not None else {}
+
+    # sync mode: only fetch the tweets newer than the last run and add them to the saved timeline
+    # checkpoints is a twitter_sync.CheckpointStore, data_dir is where the timelines are kept
+    # with no twitter_user the authenticated user's screen name is looked up and checkpointed under
+    def sync_user_timeline_tweets(self, checkpoints, data_dir, num_tweets=3200):
+        from twitter_sync import TimelineSync
+
+        return TimelineSync(self.twitter_client, checkpoints, data_dir,
+                            compact=self.compact).sync(self.twitter_user, num_tweets)
+
+    # everything saved so far by sync_user_timeline_tweets, as a data frame
+    def load_synced_timeline(self, checkpoints, data_dir):
+        from twitter_sync import TimelineSync
+
+        return TimelineSync(self.twitter_client, checkpoints, data_dir).load(self.twitter_user)
+
+
+# the most tweets (or friends) the API sends back in one page
+PAGE_SIZE = 200
+
+_STREAM_MESSAGES = METRICS.counter('stream_messages_total', "messages written by StdOutListener")
+_STREAM_ERRORS = METRICS.counter('stream_errors_total', "messages StdOutListener.on_data failed on")
+_TWEETS_SCORED = METRICS.counter('tweets_scored_total', "distinct tweet texts per scored batch, cache hits included")
+
+
+# pages from a cursor until num_items items have been handed over, the last page is cut short if needed
+def _pages(cursor, num_items):
+    remaining = num_items
+    if remaining <= 0:
+        return
+    for page in cursor.pages():
+        page = page[:remaining]
+        remaining -= len(page)
+        yield page
+        if remaining <= 0:  # stop before the cursor asks for a page nobody wants
+            return
+
+
+# Twitter Authenticator
+# this authenticator works with the cursor and doesn't interfare with the stream method
+class TwitterAuthenticator():
+    def authenticate_twitter_app(self):
+        auth = OAuthHandler(twitter_cred.CONSUMER_KEY, twitter_cred.CONSUMER_SECRET)
+        auth.set_access_token(twitter_cred.ACCESS_TOKEN, twitter_cred.ACCESS_TOKEN_SECRET)
+        return auth
+
+
+# TWEET STREAMER
+class TwitterStreamer():  # class made to stream the tweets
+
+    def __init__(self):
+        self.twitter_authenticator = TwitterAuthenticator()
+
+    # fetch_tweets_filename has the txt file and the hash_tag_list is the list of keywords
+    def stream_tweets(self, fetch_tweets_filename, hash_tag_list):
+        # class method to save tweets to txt file to process later
+        # this handles Twitter authentication and connection to Twitter API
+        listener = StdOutListener(fetch_tweets_filename, twitter_cred.CONSUMER_KEY, twitter_cred.CONSUMER_SECRET,
+                                  twitter_cred.ACCESS_TOKEN, twitter_cred.ACCESS_TOKEN_SECRET)
+        # filters twitter streams to capture data by keywords.
+        try:
+            listener.filter(track=hash_tag_list)
+        finally:
+            listener.writer.close()  # write out anything still in the buffer
+
+    # same as stream_tweets but on_data only queues each tweet, the pipeline's consumer threads
+    # parse, score and save them (see twitter_pipeline.IngestPipeline for the options)
+    def stream_tweets_to_pipeline(self, hash_tag_list, pipeline):
+        from twitter_pipeline import QueueListener
+
+        listener = QueueListener(pipeline, twitter_cred.CONSUMER_KEY, twitter_cred.CONSUMER_SECRET,
+                                 twitter_cred.ACCESS_TOKEN, twitter_cred.ACCESS_TOKEN_SECRET)
+        try:
+            listener.filter(track=hash_tag_list)
+        finally:
+            pipeline.stop()  # finish what is queued and close the capture file
+
+    # capture only the data frame columns plus sentiment into rolling parquet files in directory
+    # instead of the full raw payload, read them back with twitter_columnar.load_columnar
+    def stream_tweets_columnar(self, directory, hash_tag_list, rows_per_file=50000, workers=2):
+        from twitter_pipeline import IngestPipeline
+        from twitter_columnar import ColumnarWriter  # needs pyarrow, only imported for this mode
+
+        columnar_writer = ColumnarWriter(directory, rows_per_file=rows_per_file)
+        pipeline = IngestPipeline(None, handlers=[columnar_writer], workers=workers, policy='drop_oldest')
+        try:
+            self.stream_tweets_to_pipeline(hash_tag_list, pipeline)
+        finally:
+            columnar_writer.close()
+
+    # same as stream_tweets but into rotating shards in directory with an index for reading time windows back
+    # shard_options go to twitter_shards.ShardedWriter (max_bytes, max_seconds, compress, ...)
+    def stream_tweets_sharded(self, directory, hash_tag_list, **shard_options):
+        from twitter_shards import ShardedWriter
+
+        writer = ShardedWriter(directory, echo=True, **shard_options)
+        listener = StdOutListener(None, twitter_cred.CONSUMER_KEY, twitter_cred.CONSUMER_SECRET,
+                                  twitter_cred.ACCESS_TOKEN, twitter_cred.ACCESS_TOKEN_SECRET, writer=writer)
+        try:
+            listener.filter(track=hash_tag_list)
+        finally:
+            writer.close()
+
+
+# basic listener class to print tweets received to stdout.
+class StdOutListener(Stream):
+    # StdOutListener is a subclass of Stream where is it adding additional functions to stream
+    # constructor to associate the object to a filename
+
+    # writer replaces the TweetWriter on fetch_tweets_filename, e.g. a twitter_shards.ShardedWriter
+    def __init__(self, fetch_tweets_filename, consumer_key, consumer_secret, access_token, access_token_secret,
+                 echo=True, writer=None):
+        # get the data and put the data in the associated file
+        super().__init__(consumer_key, consumer_secret, access_token, access_token_secret)
+        # super calls the class extended(Stream) then call initialise method on class
+        self.fetch_tweets_filename = fetch_tweets_filename
+        # the file is kept open and written in buffered batches instead of opened and closed for every tweet
+        self.writer = writer if writer is not None else TweetWriter(fetch_tweets_filename, echo=echo)
+
+    @METRICS.timed('stream_on_data_seconds', "time spent in StdOutListener.on_data per message")
+    def on_data(self, raw_data):  # rewriting the function of on_data
+        # to help deal with possible errors
+        try:
+            # if successful write tweet into the file (and print it when echo is on)
+            self.writer.write(raw_data)
+            _STREAM_MESSAGES.inc()
+            return True
+        # if there was an error print the following (Ctrl+C and exit still stop the stream)
+        except Exception as e:
+            _STREAM_ERRORS.inc()
+            print("Error on_data %s" % str(e))
+
+    def on_keep_alive(self):  # sent by Twitter when the stream is quiet, a chance to flush what is buffered
+        self.writer.flush_if_due()
+
+    def on_disconnect(self):
+        self.writer.flush()
+
+    def on_error(self, status):  # static method won't affect object
+        if status == 420:  # just in case we reached the rate limits
+            # if there is an error on the on_data return False
+            return False
+        print(status)
+
+
+# analysing and categorizing the data received from Twitter
+class TwitterAnalyser():
+    # workers is how many processes to score with, 1 keeps everything in this process
+    # chunk_size is how many distinct tweets are sent to a worker per task
+    # below serial_threshold distinct tweets the pool costs more than it saves so scoring stays in this process
+    # cache is an optional twitter_cache.SentimentCache so text that was scored before is not scored again
+    def __init__(self, workers=1, chunk_size=5000, serial_threshold=20000, cache=None):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.serial_threshold = serial_threshold
+        self.cache = cache
+        self._pool = None  # started on first parallel call and kept for the next ones
+        self.cleaner = TweetCleaner()
+
+    # remove content not necessary for analysis
+    @METRICS.timed('clean_tweet_seconds', "time per TwitterAnalyser.clean_tweet call")
+    def clean_tweet(self, tweet):
+        return self.cleaner.clean(tweet)
+
+    @METRICS.timed('analyse_sentiment_seconds', "time per TwitterAnalyser.analyse_sentiment call")
+    def analyse_sentiment(self, tweet):
+        from textblob import TextBlob
+
+        polarity = TextBlob(self.clean_tweet(tweet)).sentiment.polarity
+
+        if polarity > 0:
+            return 1
+        elif polarity < 0:
+            return -1
+        else:
+            return 0
+
+    # raw polarity for a whole column of tweets at once, same numbers as TextBlob(...).sentiment.polarity
+    # the pattern lexicon is shared by every call instead of building a TextBlob per tweet
+    # and repeated texts (retweets) are only scored once then spread back out
+    @METRICS.timed('score_batch_seconds', "time per batch scored", mode='serial')
+    def analyse_polarity_batch(self, tweets):
+        import pandas as pd
+
+        codes, unique_tweets = pd.factorize(pd.Series(tweets, dtype=object), use_na_sentinel=False)
+        return self._score_unique(unique_tweets, parallel=False)[codes]
+
+    # analyse_polarity_batch that also hands back each tweet's cleaned text, so it is only cleaned once
+    # returns (list of cleaned tweets, polarity array) in the order of tweets
+    @METRICS.timed('score_batch_seconds', "time per batch scored", mode='serial')
+    def clean_and_score_batch(self, tweets):
+        import pandas as pd
+
+        codes, unique_tweets = pd.factorize(pd.Series(tweets, dtype=object), use_na_sentinel=False)
+        cleaned = self.cleaner.clean_batch(list(unique_tweets))
+        polarity = self._score_cleaned_unique(cleaned, parallel=False)
+        return [cleaned[code] for code in codes], polarity[codes]
+
+    # same -1/0/1 labels as analyse_sentiment but for a whole column, returned as a numpy array
+    def analyse_sentiment_batch(self, tweets):
+        import numpy as np
+
+        return np.sign(self.analyse_polarity_batch(tweets)).astype(np.int64)
+
+    # same numbers as analyse_polarity_batch but the distinct tweets are split into chunks
+    # and scored across the process pool, results come back in the original order
+    @METRICS.timed('score_batch_seconds', "time per batch scored", mode='parallel')
+    def analyse_polarity_parallel(self, tweets):
+        import pandas as pd
+
+        codes, unique_tweets = pd.factorize(pd.Series(tweets, dtype=object), use_na_sentinel=False)
+        parallel = self.workers > 1 and len(unique_tweets) >= self.serial_threshold
+        return self._score_unique(unique_tweets, parallel)[codes]
+
+    # score the tweets column of a data frame (serial or parallel) and attach the labels as the sentiment column
+    def add_sentiment_column(self, df, column='tweets'):
+        import numpy as np
+
+        df['sentiment'] = np.sign(self.analyse_polarity_parallel(df[column])).astype(np.int64)
+        return df
+
+    # clean the distinct tweets here and score them, through the cache when there is one
+    def _score_unique(self, unique_tweets, parallel):
+        return self._score_cleaned_unique(self.cleaner.clean_batch(list(unique_tweets)), parallel)
+
+    def _score_cleaned_unique(self, cleaned, parallel):
+        _TWEETS_SCORED.inc(len(cleaned))
+        score = self._score_cleaned_parallel if parallel else _score_cleaned
+        if self.cache is None:
+            return score(cleaned)
+        return self.cache.get_or_score(cleaned, score)
+
+    def _score_cleaned_parallel(self, cleaned):
+        chunks = [cleaned[start:start + self.chunk_size] for start in range(0, len(cleaned), self.chunk_size)]
+        if len(chunks) <= 1:  # not worth a round trip to the pool (e.g. most of it came from the cache)
+            return _score_cleaned(cleaned)
+        import numpy as np
+
+        # map keeps the chunks in the order they were sent
+        return np.concatenate(list(self._get_pool().map(_score_cleaned, chunks)))
+
+    def _get_pool(self):
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_sentiment_worker)
+        return self._pool
+
+    # data frames with a sentiment column, one per page of tweets (e.g. from TwitterClient.iter_user_timeline_pages)
+    # each page is framed and scored as it arrives, so the first results come after the first page
+    def analyse_pages(self, pages):
+        for page in pages:
+            yield self.add_sentiment_column(self.tweet_to_data_frame(page))
+
+    # the same for a stream of single tweets (e.g. iter_user_timeline_tweets), grouped chunk_size at a time
+    def analyse_tweets(self, tweets, chunk_size=PAGE_SIZE):
+        chunk = []
+        for tweet in tweets:
+            chunk.append(tweet)
+            if len(chunk) == chunk_size:
+                yield self.add_sentiment_column(self.tweet_to_data_frame(chunk))
+                chunk = []
+        if chunk:
+            yield self.add_sentiment_column(self.tweet_to_data_frame(chunk))
+
+    # shut the worker processes down when finished with the analyser
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    # for analysing data
+    # takes tweepy Status objects or raw tweet dicts from a capture file, see twitter_frame.tweets_to_frame
+    # text_column is what the tweet text column is called ('Tweets' in the older scripts)
+    @METRICS.timed('tweet_to_data_frame_seconds', "time per TwitterAnalyser.tweet_to_data_frame call")
+    def tweet_to_data_frame(self, tweets, text_column='tweets'):
+        from twitter_frame import tweets_to_frame  # brings in pandas
+
+        return tweets_to_frame(tweets, text_column=text_column)
+
+
+# scoring of already cleaned text, runs in this process or in the pool workers
+def _score_cleaned(cleaned):
+    import numpy as np
+    from textblob.en import sentiment as pattern_sentiment  # the lexicon TextBlob uses, loaded once on first use
+
+    return np.fromiter((pattern_sentiment(tweet)[0] for tweet in cleaned), dtype=np.float64, count=len(cleaned))
+
+
+# each pool worker loads the lexicon once when it starts so only the tweet text is sent with each task
+def _init_sentiment_worker():
+    from textblob.en import sentiment as pattern_sentiment
+
+    len(pattern_sentiment)  # touching the lazy lexicon makes it load the xml file now
+
+
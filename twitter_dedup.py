@@ -0,0 +1,215 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# Collapsing retweets and near duplicate tweets before scoring.
+# Most of a stream is "RT @user: ..." copies of a few originals, plus bots and copy-pasted texts that only
+# differ by a link or a truncated ending. Each tweet is put in a cluster:
+#   1. a retweet joins the cluster of the tweet it retweets (retweeted_status.id), so does the original itself
+#   2. otherwise an identical text joins that text's cluster
+#   3. otherwise a text whose SimHash is within max_distance bits of a known cluster's joins it (texts of
+#      fewer than min_words words, once links and mentions are left out, only match exactly: "sasuke 🧐"
+#      and "#sasuke" hash the same but are not copies of each other)
+# Only the first text of each cluster is scored, the polarity is handed to every tweet in it. For exact
+# retweets (identical texts) the numbers are the same as scoring each one. Clusters are remembered across
+# batches (up to max_entries, least recently seen forgotten first) so a viral tweet is scored once per run.
+# SimHash: every word of the text gets a 64 bit hash, each bit position adds up +1/-1 over the words and the
+# sign of the total is the text's bit. Texts sharing most words end up a few bits apart. To find those
+# without comparing against every cluster, the 64 bits are cut into max_distance + 1 bands: two hashes at
+# most max_distance bits apart must have at least one band exactly equal, so only clusters sharing a band
+# are compared.
+
+
+# words for the SimHash, links, mentions and the RT marker say nothing about whether two texts are the same
+_LINK_OR_MENTION = re.compile(r"\w+://\S+|@\w+|^rt\b")
+_WORD = re.compile(r"\w+")
+
+# each bit of a uint64, for turning word hashes into bit columns with one numpy operation
+_BITS = np.uint64(1) << np.arange(64, dtype=np.uint64)
+
+
+class Deduplicator():
+    def __init__(self, max_distance=3, max_entries=100000, min_words=3):
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self.max_entries = max_entries
+        self.bands = max_distance + 1
+        self._band_bits = 64 // self.bands
+        # cluster id -> [text, simhash or None, polarity or None, times seen, origins and texts pointing at it]
+        # the last two are the keys of _by_origin and _by_text to delete when the cluster is forgotten
+        self._clusters = OrderedDict()
+        self._by_origin = {}  # tweet id -> cluster id
+        self._by_text = {}  # text -> cluster id
+        self._by_band = [{} for _ in range(self.bands)]  # band value -> cluster ids
+        self._word_hashes = {}
+        self._next_cluster = 0
+        self._lock = threading.Lock()
+        # counters
+        self.tweets = 0
+        self.scored = 0
+
+    # the cluster id of every tweet (dicts, tweepy Status objects or TweetRecords), in the same order
+    def assign(self, tweets):
+        with self._lock:
+            return [self._assign(tweet) for tweet in tweets]
+
+    # polarity for every tweet, only the clusters that have not been scored yet are scored by analyser
+    # also returns the cluster ids
+    def polarity(self, tweets, analyser):
+        clusters = self.assign(tweets)
+        with self._lock:
+            # (a batch bigger than max_entries can forget clusters it assigned itself, those are left for below)
+            unscored = list(dict.fromkeys(cluster for cluster in clusters
+                                          if cluster in self._clusters and self._clusters[cluster][2] is None))
+            texts = [self._clusters[cluster][0] for cluster in unscored]
+        if texts:
+            for cluster, value in zip(unscored, analyser.analyse_polarity_batch(texts)):
+                with self._lock:
+                    entry = self._clusters.get(cluster)
+                    if entry is not None:
+                        entry[2] = float(value)
+        with self._lock:
+            self.tweets += len(tweets)
+            self.scored += len(texts)
+            # a cluster forgotten while its texts were being scored (tiny max_entries) gets scored again
+            missing = [i for i, cluster in enumerate(clusters)
+                       if cluster not in self._clusters or self._clusters[cluster][2] is None]
+            polarity = np.array([self._clusters[cluster][2] if cluster in self._clusters else np.nan
+                                 for cluster in clusters], dtype=np.float64)
+        if missing:
+            polarity[missing] = analyser.analyse_polarity_batch([_text(tweets[i]) for i in missing])
+        return polarity, clusters
+
+    # how many times each cluster has been seen so far
+    def times_seen(self, cluster):
+        with self._lock:
+            entry = self._clusters.get(cluster)
+            return entry[3] if entry is not None else 0
+
+    # IngestPipeline stage: scores the batch and tags each tweet dict with its cluster and how many
+    # tweets of that cluster have been seen so far (1 for the first)
+    def score_batch(self, tweets, analyser):
+        polarity, clusters = self.polarity(tweets, analyser)
+        with self._lock:
+            for tweet, cluster in zip(tweets, clusters):
+                entry = self._clusters.get(cluster)
+                tweet['dedup_cluster'] = cluster
+                tweet['copies_seen'] = entry[3] if entry is not None else 1
+        return polarity
+
+    def _assign(self, tweet):
+        text = _text(tweet)
+        origin = _origin_id(tweet)
+        cluster = self._by_origin.get(origin) if origin is not None else None
+        if cluster is None:
+            cluster = self._by_text.get(text)
+        simhash = None
+        if cluster is None:
+            simhash = self._simhash(text)
+            if simhash is not None:
+                cluster = self._near(simhash)
+        if cluster is None:
+            cluster = self._new_cluster(text, simhash)
+        entry = self._clusters[cluster]
+        entry[3] += 1
+        self._clusters.move_to_end(cluster)
+        if origin is not None and self._by_origin.get(origin) != cluster:
+            self._by_origin[origin] = cluster
+            entry[4].append(origin)
+        if text not in self._by_text:
+            self._by_text[text] = cluster
+            entry[5].append(text)
+        return cluster
+
+    def _new_cluster(self, text, simhash):
+        cluster = self._next_cluster
+        self._next_cluster += 1
+        self._clusters[cluster] = [text, simhash, None, 0, [], []]
+        if simhash is not None:
+            for band, value in enumerate(self._band_values(simhash)):
+                self._by_band[band].setdefault(value, []).append(cluster)
+        while len(self._clusters) > self.max_entries:
+            self._forget(next(iter(self._clusters)))
+        return cluster
+
+    # drop a cluster and every lookup pointing at it, an origin moved on to another cluster since is kept
+    def _forget(self, cluster):
+        text, simhash, polarity, seen, origins, texts = self._clusters.pop(cluster)
+        for origin in origins:
+            if self._by_origin.get(origin) == cluster:
+                del self._by_origin[origin]
+        for text in texts:
+            if self._by_text.get(text) == cluster:
+                del self._by_text[text]
+        if simhash is not None:
+            for band, value in enumerate(self._band_values(simhash)):
+                members = self._by_band[band].get(value)
+                if members is not None:
+                    members.remove(cluster)
+                    if not members:
+                        del self._by_band[band][value]
+
+    # the closest known cluster within max_distance bits, None if there is none
+    def _near(self, simhash):
+        best = None
+        best_distance = self.max_distance + 1
+        for band, value in enumerate(self._band_values(simhash)):
+            for cluster in self._by_band[band].get(value, ()):
+                distance = bin(simhash ^ self._clusters[cluster][1]).count('1')
+                if distance < best_distance:
+                    best, best_distance = cluster, distance
+        return best
+
+    def _band_values(self, simhash):
+        mask = (1 << self._band_bits) - 1
+        return [(simhash >> (band * self._band_bits)) & mask for band in range(self.bands)]
+
+    def _simhash(self, text):
+        words = _WORD.findall(_LINK_OR_MENTION.sub(' ', text.casefold()))
+        if len(words) < max(self.min_words, 1):
+            return None
+        hashes = np.fromiter((self._word_hash(word) for word in words), dtype=np.uint64, count=len(words))
+        votes = ((hashes[:, None] & _BITS) != 0).sum(axis=0) * 2 - len(words)  # +1 per set bit, -1 per clear
+        return int(np.bitwise_or.reduce(_BITS[votes > 0])) if (votes > 0).any() else 0
+
+    def _word_hash(self, word):
+        word_hash = self._word_hashes.get(word)
+        if word_hash is None:
+            word_hash = int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+            if len(self._word_hashes) < 1000000:
+                self._word_hashes[word] = word_hash
+        return word_hash
+
+
+# the tweet's data frame (see TwitterAnalyser.tweet_to_data_frame) with three more columns:
+# sentiment, cluster (tweets in the same cluster were scored once) and duplicates (tweets in the frame
+# sharing that cluster, 1 for a tweet with no copies)
+def dedup_frame(tweets, analyser, deduplicator=None, text_column='tweets'):
+    tweets = list(tweets)
+    deduplicator = deduplicator if deduplicator is not None else Deduplicator()
+    polarity, clusters = deduplicator.polarity(tweets, analyser)
+    df = analyser.tweet_to_data_frame(tweets, text_column=text_column)
+    df['sentiment'] = np.sign(polarity).astype(np.int64)
+    df['cluster'] = np.asarray(clusters, dtype=np.int64)
+    df['duplicates'] = df.groupby('cluster')['cluster'].transform('size').astype(np.int64)
+    return df
+
+
+def _text(tweet):
+    return tweet['text'] if isinstance(tweet, dict) else tweet.text
+
+
+# the id of the original for a retweet, the tweet's own id otherwise (None when it has no id)
+def _origin_id(tweet):
+    if not isinstance(tweet, dict):
+        tweet = getattr(tweet, '_json', None)  # a tweepy Status, TweetRecords don't keep the retweet
+        if tweet is None:
+            return None
+    retweeted = tweet.get('retweeted_status')
+    if retweeted is not None:
+        return retweeted.get('id')
+    return tweet.get('id')
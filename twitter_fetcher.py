@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+from requests.adapters import HTTPAdapter
+from tweepy import Cursor
+from tweepy.errors import TweepyException
+
+
+# Fetching timelines for many handles at once.
+# TwitterClient pages through one user at a time and needs a new client (and OAuth setup) for each user.
+# TimelineFetcher shares one authenticated tweepy API between a pool of threads, one handle per task.
+# Every request goes through RateLimitedAdapter on the API's HTTP session, which keeps each endpoint
+# inside Twitter's rate limit window (and waits out a 429 if one still comes back), so the Cursor
+# pagination itself stays exactly as it is in TwitterClient.
+
+
+RATE_LIMIT_WINDOW = 15 * 60  # seconds, Twitter counts requests per 15 minutes
+
+# seconds to wait after a 429 that does not say when the window resets, doubled on each retry
+BACKOFF_ON_429 = 15.0
+
+# requests allowed per window for the endpoints the clients use (user auth limits from the API reference)
+RATE_LIMITS = {
+    '/1.1/statuses/user_timeline.json': 900,
+    '/1.1/statuses/home_timeline.json': 15,
+    '/1.1/friends/list.json': 15,
+}
+
+
+# sliding window limiter, acquire() waits until another request fits in the window
+class RateLimiter():
+    def __init__(self, limit, window=RATE_LIMIT_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._sent = deque()  # monotonic times of the requests in the current window
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= self.window:
+                    self._sent.popleft()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif len(self._sent) < self.limit:
+                    self._sent.append(now)
+                    return
+                else:
+                    wait = self.window - (now - self._sent[0])
+            time.sleep(wait)
+
+    # stop sending until reset (unix time from the x-rate-limit-reset header)
+    def pause_until(self, reset):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, reset - time.time()))
+
+
+# transport adapter for the API's requests session, schedules each request against its endpoint's limiter
+# a 429 waits until x-rate-limit-reset, or for backoff seconds (doubling each retry) when there is no
+# reset header or it has already passed, rather than trying again straight away
+class RateLimitedAdapter(HTTPAdapter):
+    def __init__(self, limits=RATE_LIMITS, window=RATE_LIMIT_WINDOW, max_retries_on_429=3, backoff=BACKOFF_ON_429,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.window = window
+        self.max_retries_on_429 = max_retries_on_429
+        self.backoff = backoff
+        self._limiters = {path: RateLimiter(limit, window) for path, limit in limits.items()}
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        limiter = self._limiter_for(urlparse(request.url).path)
+        for attempt in range(self.max_retries_on_429 + 1):
+            if limiter is not None:
+                limiter.acquire()
+            response = super().send(request, **kwargs)
+            reset = response.headers.get('x-rate-limit-reset')
+            if limiter is not None and reset is not None:
+                if response.status_code == 429 or response.headers.get('x-rate-limit-remaining') == '0':
+                    limiter.pause_until(int(reset))  # the server says the window is used up
+            if limiter is not None and response.status_code == 429 and (reset is None or int(reset) <= time.time()):
+                limiter.pause_until(time.time() + self.backoff * 2 ** attempt)
+            if response.status_code != 429 or limiter is None or attempt == self.max_retries_on_429:
+                return response
+            response.close()  # try again once the limiter lets us
+
+    # endpoints not in the limits table get a limiter once the server tells us their limit
+    def _limiter_for(self, path):
+        with self._lock:
+            return self._limiters.get(path)
+
+    def build_response(self, request, resp):
+        response = super().build_response(request, resp)
+        limit = response.headers.get('x-rate-limit-limit')
+        if limit is not None:
+            path = urlparse(request.url).path
+            with self._lock:
+                if path not in self._limiters:
+                    self._limiters[path] = RateLimiter(int(limit), self.window)
+        return response
+
+
+class TimelineFetcher():
+    # api is a tweepy API, by default one is made with TwitterClient's authentication
+    # workers is how many handles are fetched at the same time
+    # compact hands back twitter_record.TweetRecord objects instead of full Status objects from the timelines,
+    # like TwitterClient(compact=True)
+    def __init__(self, api=None, workers=8, limits=RATE_LIMITS, adapter=None, compact=False):
+        if api is None:
+            from twitter_core import TwitterClient
+            api = TwitterClient().get_twitter_client_api()
+        self.api = api
+        self.workers = workers
+        self.compact = compact
+        self.adapter = adapter if adapter is not None else RateLimitedAdapter(limits, pool_maxsize=workers)
+        self.api.session.mount('https://', self.adapter)
+        self.errors = {}  # handle -> exception, for the handles that could not be fetched
+
+    # {handle: [Status, ...]} with up to num_tweets tweets from each handle's timeline (TweetRecords if compact)
+    def fetch_user_timelines(self, handles, num_tweets=200):
+        convert = None
+        if self.compact:
+            from twitter_record import TweetRecord
+
+            convert = TweetRecord.from_status
+        return self._fetch_all(self.api.user_timeline, handles, num_tweets, convert, count=200)
+
+    # {handle: [User, ...]} with up to num_friends accounts each handle follows
+    def fetch_friend_lists(self, handles, num_friends=200):
+        return self._fetch_all(self.api.get_friends, handles, num_friends, count=200)
+
+    # convert is applied to each item as it comes off the page, so only the converted ones are kept
+    def _fetch_all(self, method, handles, limit, convert=None, **kwargs):
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._fetch_one, method, handle, limit, convert, **kwargs): handle
+                       for handle in handles}
+            for future in as_completed(futures):
+                handle = futures[future]
+                try:
+                    results[handle] = future.result()
+                except TweepyException as e:
+                    self.errors[handle] = e
+                    print("Error fetching %s %s" % (handle, str(e)))
+        return {handle: results[handle] for handle in handles if handle in results}  # back in the order asked for
+
+    def _fetch_one(self, method, handle, limit, convert=None, **kwargs):
+        items = Cursor(method, screen_name=handle, **kwargs).items(limit)
+        if convert is not None:
+            items = map(convert, items)
+        return list(items)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from twitter_reader import CREATED_AT_FORMAT, source_name
+
+
+# Building the analysis data frame out of tweets in one pass.
+# Works on tweepy Status objects (or anything with the same attributes) and on the raw tweet dicts
+# read from a capture file. Each field goes into its own preallocated buffer as the tweets are walked once,
+# then every buffer is turned into a typed column in one go: int64 ids, likes and retweets, int32 lengths,
+# datetime64 dates (UTC) and a categorical source. The buffers are plain lists because setting numpy
+# elements one at a time from python is slower than converting a whole list at the end.
+
+
+FRAME_COLUMNS = ('tweets', 'id', 'len', 'date', 'source', 'likes', 'retweets')
+
+
+# text_column is the name of the text column, the analysis and visualisation scripts call it 'Tweets'
+def tweets_to_frame(tweets, text_column='tweets'):
+    if not hasattr(tweets, '__len__'):  # a generator, the buffers need to know the size up front
+        tweets = list(tweets)
+    n = len(tweets)
+
+    texts = [None] * n
+    ids = [None] * n
+    dates = [None] * n
+    sources = [None] * n
+    likes = [None] * n
+    retweets = [None] * n
+
+    from_dicts = 0
+    for i, tweet in enumerate(tweets):
+        if isinstance(tweet, dict):
+            texts[i] = tweet['text']
+            ids[i] = tweet['id']
+            dates[i] = tweet['created_at']
+            sources[i] = tweet['source']  # still the html link, cleaned up once per distinct value below
+            likes[i] = tweet['favorite_count']
+            retweets[i] = tweet['retweet_count']
+            from_dicts += 1
+        else:
+            texts[i] = tweet.text
+            ids[i] = tweet.id
+            dates[i] = tweet.created_at
+            sources[i] = tweet.source
+            likes[i] = tweet.favorite_count
+            retweets[i] = tweet.retweet_count
+
+    return pd.DataFrame({
+        text_column: np.array(texts, dtype=object),
+        'id': np.fromiter(ids, dtype=np.int64, count=n),
+        'len': np.fromiter(map(len, texts), dtype=np.int32, count=n),
+        'date': _to_utc_dates(dates, from_dicts, n),
+        'source': _to_source_categories(sources),
+        'likes': np.fromiter(likes, dtype=np.int64, count=n),
+        'retweets': np.fromiter(retweets, dtype=np.int64, count=n),
+    })
+
+
+# the app names as a categorical, source_name is only worked out once for each distinct source
+def _to_source_categories(sources):
+    codes, uniques = pd.factorize(np.array(sources, dtype=object))
+    names = [source_name(source) for source in uniques]
+    categories = list(dict.fromkeys(names))  # two different links can have the same app name
+    position = {name: code for code, name in enumerate(categories)}
+    remap = np.array([position[name] for name in names] + [-1], dtype=codes.dtype)  # -1 stays missing
+    return pd.Categorical.from_codes(remap[codes], categories)
+
+
+# dicts carry created_at as Twitter's string, Status objects already have a datetime
+def _to_utc_dates(dates, from_dicts, n):
+    if from_dicts == n:
+        return pd.to_datetime(dates, format=CREATED_AT_FORMAT, utc=True)
+    if from_dicts == 0:
+        dates = pd.DatetimeIndex(dates)
+        return dates.tz_localize('UTC') if dates.tz is None else dates.tz_convert('UTC')
+    return pd.to_datetime(dates, format='mixed', utc=True)
@@ -0,0 +1,188 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from twitter_frame import tweets_to_frame
+from twitter_reader import TweetFileReader
+from twitter_rollup import PERIODS
+
+
+# Engagement and sentiment over the whole capture history, a chunk at a time.
+# The numbers twitter_visualisation works out on one data frame (mean len, max likes, max retweets, the
+# time series) plus the share of positive/neutral/negative tweets per source and per day, without ever
+# holding more than one chunk of tweets. HistoryStats folds each chunk into running totals: a handful of
+# numbers, one row per day (or hour) and one per source, so memory is one chunk plus the size of the result
+# however many weeks of tweets go through it. The chunks come from a capture file (scored as they are
+# read), a sharded capture (ShardReader) or a columnar capture, where only the columns needed are read
+# from each parquet row group and the tweet texts are never loaded.
+
+
+# the columns HistoryStats reads from each chunk
+HISTORY_COLUMNS = ('id', 'len', 'date', 'source', 'likes', 'retweets', 'sentiment')
+
+
+class HistoryStats():
+    # period is 'hour' or 'day' (see twitter_rollup.PERIODS), the bucket for the timeline and sentiment over time
+    def __init__(self, period='day'):
+        self.period = period
+        self._seconds = dict(PERIODS)[period]
+        self.tweets = 0
+        self._len_sum = 0
+        self._max_likes = (-1, None, None)  # likes, id, text (when the chunk had the text)
+        self._max_retweets = (-1, None, None)
+        # bucket start (seconds) -> [tweets, len_sum, likes_sum, likes_max, retweets_sum, retweets_max]
+        self._buckets = {}
+        self._by_source = {}  # (source, sentiment) -> tweets
+        self._by_bucket = {}  # (bucket start, sentiment) -> tweets
+
+    # fold in a data frame in the tweet_to_data_frame layout with a sentiment column
+    def add_frame(self, df, text_column='tweets'):
+        n = len(df)
+        if not n:
+            return self
+        lengths = df['len'].to_numpy(dtype=np.int64)
+        likes = df['likes'].to_numpy(dtype=np.int64)
+        retweets = df['retweets'].to_numpy(dtype=np.int64)
+        sentiment = np.sign(df['sentiment'].to_numpy()).astype(np.int64)
+        self.tweets += n
+        self._len_sum += int(lengths.sum())
+        self._max_likes = _keep_max(self._max_likes, df, likes, text_column)
+        self._max_retweets = _keep_max(self._max_retweets, df, retweets, text_column)
+
+        seconds = pd.DatetimeIndex(df['date']).as_unit('s').asi8
+        buckets = seconds - seconds % self._seconds
+        parts = pd.DataFrame({'bucket': buckets, 'len': lengths, 'likes': likes, 'retweets': retweets})
+        grouped = parts.groupby('bucket').agg(tweets=('len', 'size'), len_sum=('len', 'sum'),
+                                              likes_sum=('likes', 'sum'), likes_max=('likes', 'max'),
+                                              retweets_sum=('retweets', 'sum'),
+                                              retweets_max=('retweets', 'max'))
+        for bucket, tweets, len_sum, likes_sum, likes_max, retweets_sum, retweets_max in grouped.itertuples():
+            totals = self._buckets.get(bucket)
+            if totals is None:
+                self._buckets[bucket] = [tweets, len_sum, likes_sum, likes_max, retweets_sum, retweets_max]
+            else:
+                totals[0] += tweets
+                totals[1] += len_sum
+                totals[2] += likes_sum
+                totals[3] = max(totals[3], likes_max)
+                totals[4] += retweets_sum
+                totals[5] = max(totals[5], retweets_max)
+
+        sources = df['source'].astype('category')
+        counts = pd.DataFrame({'source': sources, 'sentiment': sentiment}).groupby(
+            ['source', 'sentiment'], observed=True).size()
+        _add_counts(self._by_source, counts)
+        counts = pd.DataFrame({'bucket': buckets, 'sentiment': sentiment}).groupby(['bucket', 'sentiment']).size()
+        _add_counts(self._by_bucket, counts)
+        return self
+
+    # fold in every chunk of an iterable of data frames, e.g. one of the *_chunks functions below
+    def add_chunks(self, chunks, text_column='tweets'):
+        for df in chunks:
+            self.add_frame(df, text_column=text_column)
+        return self
+
+    # the single numbers: tweets, mean_len, max_likes and max_retweets with the id (and text) of that tweet
+    def summary(self):
+        return {
+            'tweets': self.tweets,
+            'mean_len': self._len_sum / self.tweets if self.tweets else None,
+            'max_likes': self._max_likes[0] if self.tweets else None,
+            'max_likes_id': self._max_likes[1],
+            'max_likes_text': self._max_likes[2],
+            'max_retweets': self._max_retweets[0] if self.tweets else None,
+            'max_retweets_id': self._max_retweets[1],
+            'max_retweets_text': self._max_retweets[2],
+        }
+
+    # one row per hour or day with tweets, mean_len, likes (sum), likes_max, retweets (sum) and retweets_max,
+    # indexed by the bucket's start (UTC) so it plots like the time series in twitter_visualisation
+    def timeline(self):
+        buckets = sorted(self._buckets)
+        rows = np.array([self._buckets[bucket] for bucket in buckets], dtype=np.int64).reshape(-1, 6)
+        return pd.DataFrame({
+            'tweets': rows[:, 0],
+            'mean_len': rows[:, 1] / np.maximum(rows[:, 0], 1),
+            'likes': rows[:, 2],
+            'likes_max': rows[:, 3],
+            'retweets': rows[:, 4],
+            'retweets_max': rows[:, 5],
+        }, index=pd.to_datetime(np.array(buckets, dtype=np.int64), unit='s', utc=True).rename('date'))
+
+    # tweets and the share of positive/neutral/negative tweets for each source, most tweets first
+    def sentiment_by_source(self):
+        return _shares(self._by_source, 'source').sort_values('tweets', ascending=False)
+
+    # the same for each hour or day, in time order
+    def sentiment_over_time(self):
+        shares = _shares(self._by_bucket, 'date').sort_index()
+        shares.index = pd.to_datetime(shares.index.to_numpy(dtype=np.int64), unit='s', utc=True).rename('date')
+        return shares
+
+
+# data frames with a sentiment column for the tweets of a capture file, chunk_size tweets at a time
+def capture_chunks(filename, analyser, chunk_size=50000):
+    return tweet_chunks(TweetFileReader(filename), analyser, chunk_size)
+
+
+# the same for any iterable of tweet dicts or Status objects, e.g. a ShardReader over a time window
+def tweet_chunks(tweets, analyser, chunk_size=50000):
+    chunk = []
+    for tweet in tweets:
+        chunk.append(tweet)
+        if len(chunk) == chunk_size:
+            yield _scored_frame(chunk, analyser)
+            chunk = []
+    if chunk:
+        yield _scored_frame(chunk, analyser)
+
+
+# data frames for a columnar capture (one file or a directory, see twitter_columnar), a parquet batch at a
+# time with only columns read; the sentiment was stored when the tweets were written
+def columnar_chunks(path, columns=HISTORY_COLUMNS, batch_size=65536):
+    import pyarrow.parquet as pq
+
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.parquet'))
+    else:
+        files = [path]
+    for filename in files:
+        parquet_file = pq.ParquetFile(filename)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=list(columns)):
+            yield batch.to_pandas()
+
+
+def _scored_frame(tweets, analyser):
+    df = tweets_to_frame(tweets)
+    df['sentiment'] = np.sign(analyser.analyse_polarity_batch(df['tweets'].tolist())).astype(np.int64)
+    return df
+
+
+# (value, id, text) of the larger of the kept tweet and this chunk's largest, the earlier one wins a tie
+def _keep_max(kept, df, values, text_column):
+    i = int(values.argmax())
+    if values[i] <= kept[0]:
+        return kept
+    text = df[text_column].iat[i] if text_column in df.columns else None
+    return int(values[i]), int(df['id'].iat[i]), text
+
+
+def _add_counts(totals, counts):
+    for key, count in counts.items():
+        totals[key] = totals.get(key, 0) + int(count)
+
+
+def _shares(totals, name):
+    counts = {}
+    for (key, sentiment), count in totals.items():
+        counts.setdefault(key, [0, 0, 0])[int(sentiment) + 1] += count  # negative, neutral, positive
+    keys = list(counts)
+    rows = np.array([counts[key] for key in keys], dtype=np.int64).reshape(-1, 3)
+    tweets = rows.sum(axis=1)
+    return pd.DataFrame({
+        'tweets': tweets,
+        'positive': rows[:, 2] / np.maximum(tweets, 1),
+        'neutral': rows[:, 1] / np.maximum(tweets, 1),
+        'negative': rows[:, 0] / np.maximum(tweets, 1),
+    }, index=pd.Index(keys, name=name))
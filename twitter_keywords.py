@@ -0,0 +1,164 @@
+import threading
+from collections import deque
+
+
+# Which of the tracked keywords each tweet matched, found in one pass over its text.
+# filter(track=hash_tag_list) only says a tweet matched something. KeywordMatcher builds an Aho-Corasick
+# automaton from the track list once, then walks each tweet's text a single time whatever the number of
+# keywords, instead of searching the text again for every keyword. Matching follows the way Twitter reads
+# the track list: case does not matter, a keyword only matches whole words ('Sasuke' matches "#Sasuke" and
+# "sasuke!" but not "Sasukeee"), and a keyword of several words matches when all of them are in the tweet.
+
+
+class KeywordMatcher():
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))  # track list order, repeats dropped
+        # every word of every keyword is one pattern, _needs[keyword] is the set of patterns it needs
+        self._needs = []
+        patterns = {}
+        for keyword in self.keywords:
+            words = keyword.casefold().split()
+            self._needs.append(frozenset(patterns.setdefault(word, len(patterns)) for word in words))
+        self._single = all(len(needs) == 1 for needs in self._needs)
+        # pattern -> the keywords (by position) needing it, enough on its own when every keyword is one word
+        self._keywords_for = [[] for _ in patterns]
+        for position, needs in enumerate(self._needs):
+            for pattern in needs:
+                self._keywords_for[pattern].append(position)
+        self._build(patterns)
+
+    # the keywords (as given in the track list) in text, in track list order
+    def match(self, text):
+        found = self._find(text)
+        if not found:
+            return []
+        if self._single:
+            positions = sorted({position for pattern in found for position in self._keywords_for[pattern]})
+        else:
+            candidates = {position for pattern in found for position in self._keywords_for[pattern]}
+            positions = sorted(position for position in candidates if self._needs[position] <= found)
+        return [self.keywords[position] for position in positions]
+
+    def match_batch(self, texts):
+        return [self.match(text) for text in texts]
+
+    # ids of the patterns found as whole words in text
+    def _find(self, text):
+        text = text.casefold()
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for end, character in enumerate(text):
+            while state and character not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(character, 0)
+            if output[state]:
+                after = text[end + 1:end + 2]
+                if after and (after.isalnum() or after == '_'):
+                    continue  # the word goes on, not a whole word match
+                for pattern, length in output[state]:
+                    start = end - length + 1
+                    if start == 0 or not (text[start - 1].isalnum() or text[start - 1] == '_'):
+                        found.add(pattern)
+        return found
+
+    # trie of the patterns, then the failure links breadth first (the longest proper suffix that is also
+    # a prefix of some pattern) with each state's outputs including those of the state its link points to
+    def _build(self, patterns):
+        goto = [{}]
+        output = [[]]
+        for word, pattern in patterns.items():
+            state = 0
+            for character in word:
+                next_state = goto[state].get(character)
+                if next_state is None:
+                    next_state = goto[state][character] = len(goto)
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append((pattern, len(word)))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in goto[state].items():
+                queue.append(next_state)
+                if state:  # the root's children fail back to the root
+                    link = fail[state]
+                    while link and character not in goto[link]:
+                        link = fail[link]
+                    fail[next_state] = goto[link].get(character, 0)
+                output[next_state] = output[next_state] + output[fail[next_state]]
+        self._goto, self._fail, self._output = goto, fail, [tuple(outputs) for outputs in output]
+
+
+# the text Twitter matched the track list against, the full text for tweets over 140 characters
+def tweet_text(tweet):
+    extended = tweet.get('extended_tweet')
+    if extended and 'full_text' in extended:
+        return extended['full_text']
+    return tweet['text']
+
+
+# Per keyword sentiment as tweets come off the stream, an IngestPipeline handler.
+# Each tweet dict gets a 'matched_keywords' list (so handlers after this one can use it) and is counted
+# under every keyword it matched; a tweet matching none counts under None.
+class KeywordSentiment():
+    def __init__(self, keywords):
+        self.matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+        self._totals = {}  # keyword -> [tweets, polarity sum, positive, negative]
+        self._lock = threading.Lock()
+
+    def add(self, tweets, polarity):
+        matched = [self.matcher.match(tweet_text(tweet)) for tweet in tweets]
+        with self._lock:
+            for tweet, keywords, tweet_polarity in zip(tweets, matched, polarity):
+                tweet['matched_keywords'] = keywords
+                tweet_polarity = float(tweet_polarity)
+                for keyword in keywords or [None]:
+                    totals = self._totals.get(keyword)
+                    if totals is None:
+                        totals = self._totals[keyword] = [0, 0.0, 0, 0]
+                    totals[0] += 1
+                    totals[1] += tweet_polarity
+                    totals[2] += tweet_polarity > 0
+                    totals[3] += tweet_polarity < 0
+
+    def __call__(self, tweets, polarity):
+        self.add(tweets, polarity)
+
+    # {keyword: {'count', 'mean_polarity', 'positive', 'negative', 'neutral'}} in track list order
+    def snapshot(self):
+        with self._lock:
+            totals = {keyword: list(values) for keyword, values in self._totals.items()}
+        result = {}
+        for keyword in self.matcher.keywords + [None]:
+            if keyword not in totals:
+                continue
+            count, polarity, positive, negative = totals[keyword]
+            result[keyword] = {
+                'count': count,
+                'mean_polarity': polarity / count,
+                'positive': positive,
+                'negative': negative,
+                'neutral': count - positive - negative,
+            }
+        return result
+
+
+# a keywords column (list of matched keywords) on a TwitterAnalyser data frame
+def add_keyword_column(df, matcher, column='tweets'):
+    df['keywords'] = matcher.match_batch(df[column].tolist())
+    return df
+
+
+# tweets and the share of positive/neutral/negative tweets for each keyword of a data frame
+# that has keywords and sentiment columns (a tweet matching two keywords counts for both)
+def keyword_breakdown(df):
+    exploded = df[['keywords', 'sentiment']].explode('keywords').dropna(subset=['keywords'])
+    breakdown = exploded.groupby('keywords')['sentiment'].agg(
+        tweets='size',
+        positive=lambda sentiment: (sentiment > 0).mean(),
+        neutral=lambda sentiment: (sentiment == 0).mean(),
+        negative=lambda sentiment: (sentiment < 0).mean())
+    return breakdown.sort_values('tweets', ascending=False)
@@ -0,0 +1,301 @@
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+
+
+# Counters, latency histograms and profiling hooks for the hot paths (on_data, clean_tweet,
+# analyse_sentiment, the batch scorers, tweet_to_data_frame and the Twitter API calls behind the cursors).
+# Everything goes through the METRICS registry below. It is off unless switched on, and when off a timed
+# function costs one attribute check on top of the call, nothing is recorded and no lock is taken.
+# Switch it on for a run with environment variables (see start_from_env), read at the start of each script:
+#   TWITTER_METRICS=metrics.prom   keep writing the metrics to that file in Prometheus text format
+#                                  (for node_exporter's textfile collector), '1' only switches them on
+#   TWITTER_METRICS_PORT=9108      serve them on http://127.0.0.1:9108/metrics
+#   TWITTER_PROFILE=cprofile:run.prof   profile the main thread with cProfile (open with pstats or snakeviz)
+#   TWITTER_PROFILE=sample:run.folded   sample every thread's stack, written as folded stacks for flamegraph.pl
+
+
+# upper bounds in seconds, from a fraction of a millisecond (cleaning one tweet) to a slow API page
+DEFAULT_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class Counter():
+    def __init__(self, registry):
+        self.registry = registry
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+
+class Histogram():
+    def __init__(self, registry, buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is everything above the highest bucket
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        if not self.registry.enabled:
+            return
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    # times the block inside the with statement
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class MetricsRegistry():
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._metrics = {}  # (name, labels) -> Counter or Histogram
+        self._help = {}
+        self._lock = threading.Lock()
+        self._exporting = None
+
+    # the counter called name with these labels, made the first time it is asked for
+    def counter(self, name, help='', **labels):
+        return self._get(Counter, name, help, labels)
+
+    def histogram(self, name, help='', buckets=DEFAULT_BUCKETS, **labels):
+        return self._get(functools.partial(Histogram, buckets=buckets), name, help, labels)
+
+    # decorator that records how long each call takes in the histogram name (seconds)
+    def timed(self, name, help='', **labels):
+        histogram = self.histogram(name, help, **labels)
+
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    # everything in the Prometheus text exposition format
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.items(), key=lambda item: item[0])
+        lines = []
+        described = set()
+        for (name, labels), metric in metrics:
+            if name not in described:
+                described.add(name)
+                if self._help.get(name):
+                    lines.append("# HELP %s %s" % (name, self._help[name]))
+                lines.append("# TYPE %s %s" % (name, 'counter' if isinstance(metric, Counter) else 'histogram'))
+            if isinstance(metric, Counter):
+                lines.append("%s%s %s" % (name, _labels(labels), metric.value))
+                continue
+            with metric._lock:
+                counts, total, count = list(metric.counts), metric.sum, metric.count
+            cumulative = 0
+            for bound, bucket_count in zip(metric.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append("%s_bucket%s %d" % (name, _labels(labels + (('le', le),)), cumulative))
+            lines.append("%s_sum%s %r" % (name, _labels(labels), total))
+            lines.append("%s_count%s %d" % (name, _labels(labels), count))
+        return "\n".join(lines) + "\n"
+
+    # write the metrics to filename, through a temporary file so a reader never sees half of it
+    def write(self, filename):
+        temporary = filename + ".tmp"
+        with open(temporary, 'w') as mf:
+            mf.write(self.render())
+        os.replace(temporary, filename)
+
+    # keep filename up to date every interval seconds in a background thread, and once more at exit
+    def export_to(self, filename, interval=15.0):
+        self.enabled = True
+        if self._exporting is not None:
+            return
+        self._exporting = threading.Event()
+
+        def run():
+            while not self._exporting.wait(interval):
+                self.write(filename)
+
+        threading.Thread(target=run, name="metrics-export", daemon=True).start()
+        atexit.register(self.write, filename)
+
+    # serve GET /metrics on host:port from a daemon thread, returns the http server (call shutdown() to stop)
+    def serve(self, port=9108, host='127.0.0.1'):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.enabled = True
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                payload = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        httpd = ThreadingHTTPServer((host, port), Handler)
+        httpd.daemon_threads = True
+        threading.Thread(target=httpd.serve_forever, name="metrics-server", daemon=True).start()
+        return httpd
+
+    # start from zero, the metrics themselves stay registered
+    def reset(self):
+        with self._lock:
+            for metric in self._metrics.values():
+                with metric._lock:
+                    if isinstance(metric, Counter):
+                        metric.value = 0
+                    else:
+                        metric.counts = [0] * len(metric.counts)
+                        metric.sum = 0.0
+                        metric.count = 0
+
+    def _get(self, make, name, help, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            metric = self._metrics.get(key)
+            if metric is None:
+                metric = self._metrics[key] = make(self)
+                if help:
+                    self._help[name] = help
+            return metric
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                             for key, value in labels)
+
+
+# the registry every module records into
+METRICS = MetricsRegistry()
+
+
+# Sampling profiler: a background thread looks at what every other thread is running every interval seconds.
+# It slows the program down far less than cProfile and sees all the threads (the pipeline consumers, the
+# fetcher's workers), at the price of only being statistically right.
+class SamplingProfiler():
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = 0
+        self.stacks = StackCounter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    # one line per distinct stack, 'outer;inner;innermost count', the input flamegraph.pl and speedscope take
+    def write(self, filename):
+        with open(filename, 'w') as pf:
+            for stack, count in self.stacks.most_common():
+                pf.write("%s %d\n" % (stack, count))
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append("%s (%s:%d)" % (code.co_name, os.path.basename(code.co_filename),
+                                                 code.co_firstlineno))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+
+# profile the with block, mode is 'cprofile' (this thread, every call) or 'sample' (every thread, sampled)
+@contextmanager
+def profiled(filename, mode='cprofile', interval=0.005):
+    stop = _start_profiler(filename, mode, interval)
+    try:
+        yield
+    finally:
+        stop()
+
+
+def _start_profiler(filename, mode, interval=0.005):
+    if mode == 'cprofile':
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+
+        def stop():
+            profile.disable()
+            profile.dump_stats(filename)
+        return stop
+    if mode == 'sample':
+        profiler = SamplingProfiler(interval).start()
+
+        def stop():
+            profiler.stop()
+            profiler.write(filename)
+        return stop
+    raise ValueError("profile mode must be 'cprofile' or 'sample'")
+
+
+# switch metrics and profiling on for this run from the environment variables described at the top
+# the scripts call this first thing in __main__, nothing happens when none of the variables are set
+def start_from_env(environ=os.environ):
+    filename = environ.get('TWITTER_METRICS')
+    port = environ.get('TWITTER_METRICS_PORT')
+    if filename:
+        METRICS.enabled = True
+        if filename != '1':
+            METRICS.export_to(filename)
+    if port:
+        METRICS.serve(int(port))
+    profile = environ.get('TWITTER_PROFILE')
+    if profile:
+        mode, _, filename = profile.partition(':')
+        atexit.register(_start_profiler(filename or "profile.out", mode))
@@ -0,0 +1,255 @@
+import json
+import os
+import queue
+import threading
+import time
+
+from tweepy import Stream
+
+from twitter_core import TwitterAnalyser
+from twitter_writer import TweetWriter
+
+
+# Ingestion pipeline for the stream.
+# The listener's on_data only puts the raw bytes on a bounded queue and returns, so the tweepy thread
+# never waits on parsing, scoring or disk. A pool of consumer threads takes tweets off the queue in
+# small batches, parses them, scores them, writes them to the capture file and passes them on to handlers.
+# When the queue is full the policy decides what happens:
+#   'block'        on_data waits for room (nothing is lost but a long stall can get the stream dropped)
+#   'drop_oldest'  the oldest queued tweet is thrown away to make room
+#   'spill'        the tweet goes to a file on disk and the consumers read it back once the queue is empty;
+#                  until the file has been read back every new tweet goes there too, so the order is kept
+#                  and the file is not left behind while the queue keeps getting refilled
+
+
+POLICIES = ('block', 'drop_oldest', 'spill')
+
+
+class IngestPipeline():
+    # fetch_tweets_filename is the capture file (None to not keep the raw tweets, e.g. with a columnar handler)
+    # handlers are called as handler(tweets, polarity) for each batch
+    # where tweets is a list of parsed tweet dicts and polarity a numpy array in the same order
+    # dedup is a twitter_dedup.Deduplicator, retweets and near duplicates are then only scored once
+    # (each tweet dict also gets 'dedup_cluster' and 'copies_seen')
+    def __init__(self, fetch_tweets_filename, handlers=(), workers=2, maxsize=10000, policy='block',
+                 batch_size=100, spill_filename=None, analyser=None, echo=False, dedup=None):
+        if policy not in POLICIES:
+            raise ValueError("policy must be one of %s, not %r" % (", ".join(POLICIES), policy))
+        self.handlers = list(handlers)
+        self.policy = policy
+        self.batch_size = batch_size
+        self.analyser = analyser if analyser is not None else TwitterAnalyser()
+        self.dedup = dedup
+        self.writer = TweetWriter(fetch_tweets_filename, echo=echo) if fetch_tweets_filename else None
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._spill = None
+        if policy == 'spill':
+            if spill_filename is None and not fetch_tweets_filename:
+                raise ValueError("the 'spill' policy needs a spill_filename when there is no capture file")
+            self._spill = SpillFile(spill_filename or fetch_tweets_filename + ".spill")
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+        # counters, read with metrics()
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.errors = 0
+        self.lag = 0.0  # seconds between a tweet arriving and being processed, for the latest batch
+        self.max_lag = 0.0
+
+        self.analyser.analyse_polarity_batch([""])  # load the lexicon before the consumers race to do it
+        self._consumers = [threading.Thread(target=self._consume, name="ingest-%d" % i, daemon=True)
+                           for i in range(workers)]
+        for consumer in self._consumers:
+            consumer.start()
+
+    # called from on_data, only queues the raw bytes with the time they arrived
+    def put(self, raw_data):
+        item = (time.monotonic(), raw_data)
+        self.received += 1
+        if self.policy == 'block':
+            self._queue.put(item)
+            return
+        if self._spill is not None and len(self._spill):  # behind what was spilled already
+            self._spill.push(item)
+            self.spilled += 1
+            return
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                if self.policy == 'spill':
+                    self._spill.push(item)
+                    self.spilled += 1
+                    return
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass  # a consumer just made room
+
+    # queue depth and lag, for keeping an eye on whether the consumers keep up
+    def metrics(self):
+        metrics = {
+            'queue_depth': self._queue.qsize(),
+            'spill_depth': len(self._spill) if self._spill is not None else 0,
+            'received': self.received,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'errors': self.errors,
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+        }
+        if self.dedup is not None:
+            metrics['scored'] = self.dedup.scored  # texts scored, the rest reused a duplicate's polarity
+        return metrics
+
+    # let the consumers finish what is queued (and spilled), then close the capture file
+    def stop(self):
+        self._stopping.set()
+        for consumer in self._consumers:
+            consumer.join()
+        if self.writer is not None:
+            self.writer.close()
+        if self._spill is not None:
+            self._spill.close()
+
+    def _consume(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                try:
+                    self._process(batch)
+                except Exception as e:  # anything _process doesn't catch itself, the consumer must keep going
+                    self._error("Error processing batch %s" % str(e))
+            elif self._stopping.is_set():
+                return
+            elif self.writer is not None:
+                self.writer.flush_if_due()  # quiet stream, do not leave tweets sitting in the buffer
+
+    # up to batch_size items from the queue, or from the spill file once the queue is empty
+    # (whatever is in the queue while there is a spill arrived before the spill started)
+    def _next_batch(self):
+        try:
+            batch = [self._queue.get_nowait()]
+        except queue.Empty:
+            if self._spill is not None and len(self._spill):
+                return self._spill.pop(self.batch_size)
+            try:
+                batch = [self._queue.get(timeout=0.2)]
+            except queue.Empty:
+                return self._spill.pop(self.batch_size) if self._spill is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch):
+        tweets = []
+        for arrived, raw_data in batch:
+            if self.writer is not None:
+                try:
+                    self.writer.write(raw_data)
+                except Exception as e:
+                    self._error("Error writing tweet %s" % str(e))
+            try:
+                tweet = json.loads(raw_data)
+            except ValueError as e:
+                self._error("Error parsing tweet %s" % str(e))
+                continue
+            if 'text' in tweet:  # skip delete and limit notices
+                tweets.append(tweet)
+
+        polarity = None
+        if tweets:
+            try:
+                if self.dedup is not None:
+                    polarity = self.dedup.score_batch(tweets, self.analyser)
+                else:
+                    polarity = self.analyser.analyse_polarity_batch([tweet['text'] for tweet in tweets])
+            except Exception as e:  # the batch is still counted and written, just not passed on
+                self._error("Error scoring batch %s" % str(e))
+        if polarity is not None:
+            for handler in self.handlers:
+                try:
+                    handler(tweets, polarity)
+                except Exception as e:
+                    self._error("Error in handler %s" % str(e))
+
+        lag = time.monotonic() - batch[0][0]  # the oldest item in the batch waited the longest
+        with self._lock:
+            self.processed += len(batch)
+            self.lag = lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def _error(self, message):
+        with self._lock:
+            self.errors += 1
+        print(message)
+
+
+# overflow for the 'spill' policy, a first in first out list of tweets kept in a file
+# one "<arrival time> <raw tweet>" line per tweet, the file is emptied whenever the reader catches up
+class SpillFile():
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, 'w+b')
+        self._lock = threading.Lock()
+        self._read_pos = 0
+        self._write_pos = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def push(self, item):
+        arrived, raw_data = item
+        with self._lock:
+            self._file.seek(self._write_pos)
+            self._file.write(b"%.6f %s\n" % (arrived, raw_data))
+            self._write_pos = self._file.tell()
+            self._count += 1
+
+    def pop(self, n):
+        items = []
+        with self._lock:
+            if self._count == 0:
+                return items
+            self._file.flush()
+            self._file.seek(self._read_pos)
+            while len(items) < n and self._count > 0:
+                arrived, raw_data = self._file.readline().rstrip(b"\n").split(b" ", 1)
+                items.append((float(arrived), raw_data))
+                self._count -= 1
+            self._read_pos = self._file.tell()
+            if self._count == 0:  # caught up, start the file again from the beginning
+                self._file.seek(0)
+                self._file.truncate()
+                self._read_pos = self._write_pos = 0
+        return items
+
+    def close(self):
+        self._file.close()
+        os.remove(self.filename)
+
+
+# listener that hands every message straight to an IngestPipeline
+class QueueListener(Stream):
+    def __init__(self, pipeline, consumer_key, consumer_secret, access_token, access_token_secret):
+        super().__init__(consumer_key, consumer_secret, access_token, access_token_secret)
+        self.pipeline = pipeline
+
+    def on_data(self, raw_data):
+        self.pipeline.put(raw_data)
+        return True
+
+    def on_error(self, status):
+        if status == 420:  # just in case we reached the rate limits
+            return False
+        print(status)
@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+
+# Headless time series charts for the visualisation script.
+# Plotting every tweet means millions of line segments with months of data, most of them landing on the same
+# pixel column, so the series is cut down to a fixed number of time buckets first:
+#   'minmax'    the lowest and highest tweet of each bucket are kept (at their own dates), spikes stay visible
+#   'resample'  each bucket becomes its mean, a smoother line
+# The chart then has at most about two points per bucket whatever the amount of data, so drawing takes
+# the same time for a thousand tweets or ten million. The figure is drawn with the Agg canvas straight to
+# a file, no window or display is needed. The file type comes from the extension (.png, .svg, .pdf).
+
+
+DOWNSAMPLE_MODES = ('minmax', 'resample')
+
+# the charts in "Visualisation test": file name, columns drawn and their colours (None is matplotlib's choice)
+CHARTS = (
+    ("Length of tweets over time (series)", ['len'], ['r']),
+    ("number of likes over time (series)", ['likes'], ['r']),
+    ("number of retweets over time (series)", ['retweets'], ['r']),
+    ("likes and retweets over time(layered series)", ['likes', 'retweets'], [None, None]),
+)
+
+
+# dates and values cut down to buckets time buckets, returned as (datetime64 array, float array) in date order
+def downsample(dates, values, buckets=1600, mode='minmax'):
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError("mode must be one of %s" % ', '.join(DOWNSAMPLE_MODES))
+    dates = _plain_dates(dates)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= 2 * buckets:  # already small enough to draw as it is
+        order = np.argsort(dates, kind='stable')
+        return dates[order], values[order]
+    return _downsample_columns(dates, {'values': values}, buckets, mode)['values']
+
+
+# one bucketing of the dates shared by every column, so a layered chart only sorts and buckets once
+def _downsample_columns(dates, columns, buckets, mode):
+    ticks = dates.view(np.int64)
+    start = ticks.min()
+    span = ticks.max() - start + 1
+    codes = np.minimum(((ticks - start) / span * buckets).astype(np.int64), buckets - 1)  # float rounding at the end
+
+    result = {}
+    if mode == 'resample':
+        bucket_dates = dates.min() + (np.arange(buckets) * (span / buckets)).astype('timedelta64[%s]' % _unit(dates))
+        for name, values in columns.items():
+            sums = np.bincount(codes, weights=values, minlength=buckets)
+            counts = np.bincount(codes, minlength=buckets)
+            filled = counts > 0  # empty buckets are left out rather than drawn as zero
+            result[name] = bucket_dates[filled], sums[filled] / counts[filled]
+        return result
+
+    for name, values in columns.items():
+        # positions of the lowest and highest value in each bucket, pandas groups by hash so this stays linear
+        grouped = pd.Series(values).groupby(codes, sort=False)
+        keep = np.union1d(grouped.idxmin().to_numpy(), grouped.idxmax().to_numpy())
+        keep = keep[np.argsort(ticks[keep], kind='stable')]
+        result[name] = dates[keep], values[keep]
+    return result
+
+
+# datetime64 numpy array without a timezone (UTC), which is what matplotlib plots directly
+def _plain_dates(dates):
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_convert('UTC').tz_localize(None)
+    return dates.to_numpy()
+
+
+def _unit(dates):
+    return np.datetime_data(dates.dtype)[0]
+
+
+# draw the columns of df against its date column into filename, several columns make a layered chart
+def render_chart(filename, df, columns, colors=None, buckets=1600, mode='minmax', figsize=(16, 4), dpi=100,
+                 title=None):
+    if mode not in DOWNSAMPLE_MODES:
+        raise ValueError("mode must be one of %s" % ', '.join(DOWNSAMPLE_MODES))
+    colors = colors or [None] * len(columns)
+    dates = _plain_dates(df['date'])
+    values = {column: df[column].to_numpy(dtype=np.float64) for column in columns}
+    if len(dates) > 2 * buckets:
+        series = _downsample_columns(dates, values, buckets, mode)
+    else:
+        order = np.argsort(dates, kind='stable')
+        series = {column: (dates[order], column_values[order]) for column, column_values in values.items()}
+
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    for column, color in zip(columns, colors):
+        column_dates, column_values = series[column]
+        axes.plot(column_dates, column_values, color=color, label=column, linewidth=0.8)
+    if len(columns) > 1:
+        axes.legend()
+    if title:
+        axes.set_title(title)
+    figure.autofmt_xdate()
+    figure.savefig(filename)
+    return filename
+
+
+# every chart in CHARTS written into directory as file_format (png or svg), returns the file names
+def render_timelines(df, directory, file_format='png', buckets=1600, mode='minmax'):
+    os.makedirs(directory, exist_ok=True)
+    filenames = []
+    for name, columns, colors in CHARTS:
+        filename = os.path.join(directory, "%s.%s" % (name, file_format))
+        filenames.append(render_chart(filename, df, columns, colors, buckets=buckets, mode=mode))
+    return filenames
@@ -0,0 +1,110 @@
+import json
+import mmap
+
+# orjson parses several times faster than the json module, use it when it is installed
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+
+# Reading tweets back out of a capture file written by the stream listeners (tweets.txt).
+# The file is newline delimited JSON with blank lines in between. It is memory mapped and read
+# one line at a time so only the current chunk of tweets is held in memory, however big the file is.
+
+
+# the fields TwitterAnalyser.tweet_to_data_frame uses, everything else in the payload is dropped
+TWEET_FIELDS = ('text', 'id', 'created_at', 'source', 'favorite_count', 'retweet_count')
+
+# how much of the mapped file is read before those pages are handed back, see TweetFileReader._lines
+RELEASE_BYTES = 64 * 1024 * 1024
+
+# how Twitter writes created_at, e.g. "Mon Jul 11 19:15:17 +0000 2022"
+CREATED_AT_FORMAT = '%a %b %d %H:%M:%S %z %Y'
+
+
+# the app name out of the html link Twitter sends as the source, the same value tweepy puts in Status.source
+def source_name(source):
+    if source and '<' in source:
+        # <a href="{source_url}" rel="nofollow">{source}</a>
+        return source[source.find('>') + 1:source.rfind('<')]
+    return source
+
+
+class TweetFileReader():
+    # fields is the keys kept from each tweet, None keeps the whole payload
+    # messages without a 'text' (delete and limit notices) are skipped
+    def __init__(self, filename, fields=TWEET_FIELDS):
+        self.filename = filename
+        self.fields = fields
+        self.records = 0  # tweets read so far
+        self.skipped = 0  # lines that could not be parsed, e.g. a half written last line
+
+    def __iter__(self):
+        fields = self.fields
+        for tweet, raw_data in self.messages():
+            if 'text' not in tweet:
+                continue
+            self.records += 1
+            if fields is None:
+                yield tweet
+            else:
+                yield {field: tweet.get(field) for field in fields}
+
+    # every message in the file (notices too) as (parsed dict, raw bytes as the stream sent them)
+    def messages(self):
+        for line in self._lines():
+            yield from self._parse(line)
+
+    # lists of up to chunk_size tweets, so a multi GB file can be worked through a chunk at a time
+    def chunks(self, chunk_size=10000):
+        chunk = []
+        for tweet in self:
+            chunk.append(tweet)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _lines(self):
+        with open(self.filename, 'rb') as tf:
+            try:
+                mm = mmap.mmap(tf.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file, nothing to map
+                return
+            with mm:
+                readline = mm.readline
+                released = 0
+                line = readline()
+                while line:
+                    line = line.strip()
+                    if line:  # skip the blank separator lines
+                        yield line
+                    line = readline()
+                    # the pages already read would otherwise stay resident until the end, as big as the file
+                    if mm.tell() - released >= RELEASE_BYTES and hasattr(mmap, 'MADV_DONTNEED'):
+                        end = mm.tell() - mm.tell() % mmap.PAGESIZE
+                        mm.madvise(mmap.MADV_DONTNEED, released, end - released)
+                        released = end
+
+    def _parse(self, line):
+        try:
+            return ((loads(line), line),)
+        except ValueError:
+            pass
+        # early captures have a few tweets written on one line with no newline between them
+        decoder = json.JSONDecoder()
+        text = line.decode('utf-8', errors='replace')
+        messages = []
+        position = 0
+        while position < len(text):
+            start = position
+            try:
+                tweet, position = decoder.raw_decode(text, position)
+            except ValueError:
+                self.skipped += 1  # truncated, keep whatever came before it
+                break
+            messages.append((tweet, text[start:position].encode('utf-8')))
+        return messages
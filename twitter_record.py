@@ -0,0 +1,93 @@
+import sys
+from datetime import datetime
+from functools import lru_cache
+
+from twitter_reader import CREATED_AT_FORMAT, TweetFileReader, source_name
+
+
+# Compact tweet record.
+# A tweepy Status keeps the whole payload (_json), a User object and nested dicts for every tweet, several
+# kilobytes each, when the analysis only reads six fields. TweetRecord keeps just those (plus the author's
+# screen name) in __slots__, so there is no per record __dict__ either. It has the same attribute names as
+# Status, so tweets_to_frame and anything else reading Status attributes takes records unchanged.
+# created_at is a timezone aware datetime like Status.created_at and source is the app name like
+# Status.source; both are shared between records with the same value instead of stored once per tweet.
+
+
+class TweetRecord():
+    __slots__ = ('text', 'id', 'created_at', 'source', 'favorite_count', 'retweet_count', 'screen_name')
+
+    def __init__(self, text, id, created_at, source, favorite_count, retweet_count, screen_name=None):
+        self.text = text
+        self.id = id
+        self.created_at = created_at
+        self.source = source
+        self.favorite_count = favorite_count
+        self.retweet_count = retweet_count
+        self.screen_name = screen_name
+
+    # from a tweet dict as Twitter sends it (a stream message, a capture file line or Status._json)
+    @classmethod
+    def from_json(cls, tweet):
+        user = tweet.get('user')
+        return cls(tweet['text'], tweet['id'], _created_at(tweet['created_at']), _source(tweet['source']),
+                   tweet['favorite_count'], tweet['retweet_count'],
+                   _screen_name(user['screen_name']) if user else None)
+
+    # from a tweepy Status, which can be dropped afterwards
+    @classmethod
+    def from_status(cls, status):
+        user = getattr(status, 'user', None)
+        return cls(status.text, status.id, _created_at_value(status.created_at), _source(status.source),
+                   status.favorite_count, status.retweet_count,
+                   _screen_name(user.screen_name) if user is not None else None)
+
+    # the same fields as a dict, e.g. to write back out as JSON
+    def to_dict(self):
+        return {
+            'text': self.text,
+            'id': self.id,
+            'created_at': self.created_at.strftime(CREATED_AT_FORMAT),
+            'source': self.source,
+            'favorite_count': self.favorite_count,
+            'retweet_count': self.retweet_count,
+            'user': {'screen_name': self.screen_name},
+        }
+
+    def __repr__(self):
+        return "TweetRecord(id=%r, created_at=%r, text=%r)" % (self.id, self.created_at, self.text)
+
+
+# records for a mix of tweepy Status objects and tweet dicts, e.g. one page of a timeline
+def to_records(tweets):
+    return [TweetRecord.from_json(tweet) if isinstance(tweet, dict) else TweetRecord.from_status(tweet)
+            for tweet in tweets]
+
+
+# every tweet in a capture file as a record, each parsed payload is dropped as soon as its record is made
+def read_records(filename):
+    for tweet in TweetFileReader(filename, fields=None):
+        yield TweetRecord.from_json(tweet)
+
+
+# tweets from the same second share one datetime, parsing the date is also the slowest part of a record
+@lru_cache(maxsize=4096)
+def _created_at(created_at):
+    return datetime.strptime(created_at, CREATED_AT_FORMAT)
+
+
+# Status already has the datetime, equal ones are shared the same way
+@lru_cache(maxsize=4096)
+def _created_at_value(created_at):
+    return created_at
+
+
+# a handful of apps send nearly every tweet, one string each is kept for all the records
+@lru_cache(maxsize=1024)
+def _source(source):
+    return sys.intern(source_name(source) or '')
+
+
+@lru_cache(maxsize=65536)
+def _screen_name(screen_name):
+    return screen_name
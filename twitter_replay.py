@@ -0,0 +1,94 @@
+import sys
+import time
+
+from twitter_reader import TweetFileReader
+
+
+# Offline replay of a capture file (tweets.txt) into a stream listener, so the listeners and everything
+# behind them can be run and timed without Twitter credentials or a network connection.
+# speed sets the pace: None sends the messages as fast as on_data takes them, 1.0 keeps the gaps they
+# were captured with (from timestamp_ms) and N plays them N times faster.
+
+
+class CaptureReplayer():
+    # track works like the stream's filter(track=...), only tweets mentioning one of the words are sent
+    # loops plays the capture that many times, for captures too small to time on their own
+    def __init__(self, capture_filename, speed=None, track=None, loops=1):
+        self.capture_filename = capture_filename
+        self.speed = speed
+        self.track = [word.lower() for word in track] if track else None
+        self.loops = loops
+
+    # the raw messages of one loop, with the time each was captured (None if it has no timestamp_ms)
+    def messages(self):
+        for tweet, raw_data in TweetFileReader(self.capture_filename).messages():
+            if self.track is not None:
+                text = tweet.get('text', '').lower()
+                if not any(word in text for word in self.track):
+                    continue
+            timestamp_ms = tweet.get('timestamp_ms')
+            yield (int(timestamp_ms) / 1000.0 if timestamp_ms is not None else None), raw_data
+
+    # feed every message to listener.on_data, stops early if on_data returns False like tweepy does
+    # returns {'messages', 'seconds', 'messages_per_sec'}
+    def replay(self, listener):
+        # read the capture up front so reading the file is not part of the timing
+        # one loop's worth is kept and sent loops times, so memory does not grow with loops
+        messages = list(self.messages())
+        sent = 0
+        stopped = False
+        start = time.perf_counter()
+        for _ in range(self.loops):
+            if stopped:
+                break
+            first_captured = None  # every loop is paced from its own first message
+            for captured, raw_data in messages:
+                if self.speed is not None and captured is not None:
+                    if first_captured is None:
+                        first_captured = captured
+                        start_of_loop = time.perf_counter()
+                    wait = start_of_loop + (captured - first_captured) / self.speed - time.perf_counter()
+                    if wait > 0:
+                        time.sleep(wait)
+                sent += 1
+                if listener.on_data(raw_data) is False:
+                    stopped = True
+                    break
+        seconds = time.perf_counter() - start
+        return {'messages': sent, 'seconds': seconds, 'messages_per_sec': sent / seconds if seconds else 0.0}
+
+
+# a listener class whose filter() replays a capture instead of connecting to Twitter
+# e.g. replaying(StdOutListener, "tweets.txt")("out.txt", "", "", "", "").filter(track=["Kakashi"])
+def replaying(listener_class, capture_filename, speed=None, loops=1):
+    class ReplayListener(listener_class):
+        def filter(self, track=None, **kwargs):
+            result = CaptureReplayer(capture_filename, speed, track, loops).replay(self)
+            self.on_closed(None)
+            return result
+
+        def on_closed(self, response):
+            pass  # nothing to close, there was no connection
+
+    ReplayListener.__name__ = "Replay" + listener_class.__name__
+    return ReplayListener
+
+
+if __name__ == "__main__":
+    # python twitter_replay.py capture.txt output.txt [speed]
+    # replays capture.txt through twitter_core.StdOutListener into output.txt
+    from twitter_core import StdOutListener
+    from twitter_metrics import start_from_env
+
+    start_from_env()  # e.g. TWITTER_PROFILE=sample:replay.folded to see where on_data spends its time
+
+    capture_filename, output_filename = sys.argv[1], sys.argv[2]
+    speed = float(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    listener = replaying(StdOutListener, capture_filename, speed)(output_filename, "", "", "", "", echo=False)
+    try:
+        result = listener.filter()
+    finally:
+        listener.writer.close()
+    print("replayed %d messages in %.2fs (%.0f messages/sec)"
+          % (result['messages'], result['seconds'], result['messages_per_sec']))
@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from twitter_reader import CREATED_AT_FORMAT
+
+
+# Pre-aggregated rollups of engagement and sentiment.
+# Every tweet added is folded into one row per (handle, hour) and (handle, day) in a small sqlite file:
+# tweet count, sum and max of likes and retweets, total length (for the mean) and how many were positive,
+# neutral and negative. '*' holds the same numbers for every handle together. Rows are upserted, so the
+# store grows with the number of hours covered times the number of handles seen in each hour, not the number
+# of tweets. That is a few rows an hour for add_frame on one handle, but a track= stream brings a new author
+# with nearly every tweet, so there it is close to a row per tweet for the handles and only '*' stays small.
+# A chart or dashboard over '*' still reads a few kilobytes instead of the whole capture. Adding the same
+# tweet twice counts it twice, feed it tweets once (the stream and TimelineSync both only hand over new ones).
+
+
+# name -> bucket length in seconds
+PERIODS = (('hour', 60 * 60), ('day', 24 * 60 * 60))
+
+ROLLUP_COLUMNS = ('tweets', 'likes_sum', 'likes_max', 'retweets_sum', 'retweets_max', 'len_sum',
+                  'positive', 'neutral', 'negative')
+
+
+class RollupStore():
+    def __init__(self, path, periods=PERIODS):
+        self.path = path
+        self.periods = tuple(periods)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS rollups (handle TEXT NOT NULL, period TEXT NOT NULL, "
+                         "bucket INTEGER NOT NULL, %s, PRIMARY KEY (handle, period, bucket)) WITHOUT ROWID"
+                         % ', '.join("%s INTEGER NOT NULL" % column for column in ROLLUP_COLUMNS))
+        self._db.commit()
+        self._lock = threading.Lock()  # the pipeline's consumer threads all add to the same store
+
+    # IngestPipeline handler, tweets are parsed tweet dicts and polarity a numpy array in the same order
+    def add(self, tweets, polarity):
+        if not len(tweets):
+            return
+        self._add(pd.DataFrame({
+            'handle': [tweet.get('user', {}).get('screen_name') or '' for tweet in tweets],
+            'time': _tweet_seconds(tweets),
+            'likes': np.fromiter((tweet['favorite_count'] for tweet in tweets), dtype=np.int64, count=len(tweets)),
+            'retweets': np.fromiter((tweet['retweet_count'] for tweet in tweets), dtype=np.int64,
+                                    count=len(tweets)),
+            'len': np.fromiter((len(tweet['text']) for tweet in tweets), dtype=np.int64, count=len(tweets)),
+            'sentiment': np.sign(np.asarray(polarity, dtype=np.float64)).astype(np.int64),
+        }))
+
+    def __call__(self, tweets, polarity):
+        self.add(tweets, polarity)
+
+    # a data frame from TwitterAnalyser (date, likes, retweets, len and a sentiment column) for one handle,
+    # e.g. what TwitterClient.sync_user_timeline_tweets just fetched
+    def add_frame(self, df, handle, sentiment_column='sentiment'):
+        if not len(df):
+            return
+        self._add(pd.DataFrame({
+            'handle': handle,
+            'time': pd.DatetimeIndex(df['date']).as_unit('s').asi8,
+            'likes': df['likes'].to_numpy(dtype=np.int64),
+            'retweets': df['retweets'].to_numpy(dtype=np.int64),
+            'len': df['len'].to_numpy(dtype=np.int64),
+            'sentiment': df[sentiment_column].to_numpy(dtype=np.int64),
+        }))
+
+    # the rollup rows for a handle ('*' for everything) as a data frame ordered by time
+    # start and end are anything pandas reads as a time, e.g. '2022-07-01' (end is not included)
+    def query(self, handle='*', period='day', start=None, end=None):
+        sql = "SELECT bucket, %s FROM rollups WHERE handle = ? AND period = ?" % ', '.join(ROLLUP_COLUMNS)
+        params = [handle, period]
+        if start is not None:
+            sql += " AND bucket >= ?"
+            params.append(_seconds(start))
+        if end is not None:
+            sql += " AND bucket < ?"
+            params.append(_seconds(end))
+        with self._lock:
+            rows = self._db.execute(sql + " ORDER BY bucket", params).fetchall()
+        df = pd.DataFrame(rows, columns=('bucket',) + ROLLUP_COLUMNS)
+        df['bucket'] = pd.to_datetime(df['bucket'], unit='s', utc=True)
+        df['mean_len'] = df['len_sum'] / df['tweets']
+        return df
+
+    # the numbers the visualisation script works out from the raw data frame, over everything stored
+    # {'tweets', 'mean_len', 'max_likes', 'max_retweets', 'positive', 'neutral', 'negative'}
+    def summary(self, handle='*'):
+        period = self.periods[-1][0]  # the longest buckets have the fewest rows to add up
+        with self._lock:
+            row = self._db.execute("SELECT sum(tweets), sum(len_sum), max(likes_max), max(retweets_max), "
+                                   "sum(positive), sum(neutral), sum(negative) FROM rollups "
+                                   "WHERE handle = ? AND period = ?", (handle, period)).fetchone()
+        tweets = row[0] or 0
+        return {
+            'tweets': tweets,
+            'mean_len': row[1] / tweets if tweets else 0.0,
+            'max_likes': row[2] or 0,
+            'max_retweets': row[3] or 0,
+            'positive': row[4] or 0,
+            'neutral': row[5] or 0,
+            'negative': row[6] or 0,
+        }
+
+    def handles(self):
+        with self._lock:
+            rows = self._db.execute("SELECT DISTINCT handle FROM rollups WHERE handle != '*'").fetchall()
+        return sorted(row[0] for row in rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # one upsert per (handle, period, bucket) touched by the batch, added to whatever is stored already
+    def _add(self, batch):
+        batch['positive'] = batch['sentiment'] > 0
+        batch['neutral'] = batch['sentiment'] == 0
+        batch['negative'] = batch['sentiment'] < 0
+        # and again under '*', except the rows already under '*' (add_frame(df, '*')) so they count once
+        batch = pd.concat([batch, batch[batch['handle'] != '*'].assign(handle='*')], ignore_index=True)
+        rows = []
+        for period, seconds in self.periods:
+            batch['bucket'] = batch['time'] // seconds * seconds
+            grouped = batch.groupby(['handle', 'bucket'], sort=False).agg(
+                tweets=('likes', 'size'), likes_sum=('likes', 'sum'), likes_max=('likes', 'max'),
+                retweets_sum=('retweets', 'sum'), retweets_max=('retweets', 'max'), len_sum=('len', 'sum'),
+                positive=('positive', 'sum'), neutral=('neutral', 'sum'), negative=('negative', 'sum'))
+            for (handle, bucket), values in zip(grouped.index, grouped.itertuples(index=False)):
+                rows.append((handle, period, int(bucket)) + tuple(int(value) for value in values))
+        with self._lock:
+            self._db.executemany(_UPSERT, rows)
+            self._db.commit()
+
+
+_UPSERT = ("INSERT INTO rollups VALUES (?, ?, ?, %s) ON CONFLICT(handle, period, bucket) DO UPDATE SET "
+           "tweets = tweets + excluded.tweets, "
+           "likes_sum = likes_sum + excluded.likes_sum, likes_max = max(likes_max, excluded.likes_max), "
+           "retweets_sum = retweets_sum + excluded.retweets_sum, "
+           "retweets_max = max(retweets_max, excluded.retweets_max), "
+           "len_sum = len_sum + excluded.len_sum, positive = positive + excluded.positive, "
+           "neutral = neutral + excluded.neutral, negative = negative + excluded.negative"
+           % ', '.join('?' * len(ROLLUP_COLUMNS)))
+
+
+# when each tweet was sent in whole seconds, timestamp_ms is on stream messages, created_at on everything
+def _tweet_seconds(tweets):
+    if all('timestamp_ms' in tweet for tweet in tweets):
+        return np.fromiter((int(tweet['timestamp_ms']) // 1000 for tweet in tweets), dtype=np.int64,
+                           count=len(tweets))
+    dates = pd.to_datetime([tweet['created_at'] for tweet in tweets], format=CREATED_AT_FORMAT, utc=True)
+    return dates.as_unit('s').asi8
+
+
+def _seconds(when):
+    when = pd.Timestamp(when)
+    if when.tz is None:
+        when = when.tz_localize('UTC')
+    return int(when.timestamp())
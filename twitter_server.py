@@ -0,0 +1,230 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from twitter_core import TwitterAnalyser
+from twitter_metrics import METRICS, start_from_env
+
+
+# Long running HTTP server for sentiment scoring, so other services do not have to run a script
+# (and import pandas, tweepy and textblob again) for every batch of text.
+#   POST /sentiment  {"texts": ["...", ...]}  ->  {"cleaned": [...], "polarity": [...], "sentiment": [...]}
+#   GET  /metrics    request and text counts, p50/p99 latency and throughput
+#   GET  /metrics/prometheus  the twitter_metrics timers and counters (clean, score) in Prometheus text format
+#   GET  /health
+# Requests arriving at the same time are micro batched: the texts of everything waiting are cleaned and
+# scored together in one TwitterAnalyser.clean_and_score_batch call, then split back up per request.
+# If scoring a batch fails every request in it gets a 500 rather than waiting forever.
+
+
+class MicroBatcher():
+    # a batch is scored once it holds max_batch texts or the oldest request has waited max_wait seconds
+    def __init__(self, analyser, max_batch=2000, max_wait=0.005):
+        self.analyser = analyser
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self._pending = deque()  # (texts, future)
+        self._ready = threading.Condition()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    # a Future for (cleaned texts, polarity) of texts, scored with whatever else is waiting
+    def submit(self, texts):
+        future = Future()
+        with self._ready:
+            self._pending.append((texts, future))
+            self._ready.notify()
+        return future
+
+    def stop(self):
+        with self._ready:
+            self._stopping = True
+            self._ready.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._ready:
+                while not self._pending and not self._stopping:
+                    self._ready.wait()
+                if self._stopping and not self._pending:
+                    return
+                # give other requests a moment to join the batch, unless it is already full
+                deadline = time.monotonic() + self.max_wait
+                while sum(len(texts) for texts, future in self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._stopping:
+                        break
+                    self._ready.wait(remaining)
+                batch = []
+                size = 0
+                while self._pending and (not batch or size + len(self._pending[0][0]) <= self.max_batch):
+                    texts, future = self._pending.popleft()
+                    batch.append((texts, future))
+                    size += len(texts)
+            self._score(batch)
+
+    def _score(self, batch):
+        self.batches += 1
+        try:
+            cleaned, polarity = self.analyser.clean_and_score_batch(
+                [text for texts, future in batch for text in texts])
+            start = 0
+            for texts, future in batch:
+                future.set_result((cleaned[start:start + len(texts)], polarity[start:start + len(texts)]))
+                start += len(texts)
+        except Exception as e:  # every request still waiting on this batch gets the error
+            print("Error scoring batch %s" % str(e))
+            for texts, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+# request latencies and counts for /metrics, latencies are kept for the last `keep` requests
+class LatencyStats():
+    def __init__(self, keep=10000):
+        self.requests = 0
+        self.texts = 0
+        self.started = time.monotonic()
+        self._latencies = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def record(self, latency, num_texts):
+        with self._lock:
+            self.requests += 1
+            self.texts += num_texts
+            self._latencies.append(latency)
+
+    def summary(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000.0
+            requests, texts = self.requests, self.texts
+        elapsed = time.monotonic() - self.started
+        return {
+            'requests': requests,
+            'texts': texts,
+            'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            'p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else 0.0,
+            'texts_per_sec': texts / elapsed if elapsed else 0.0,
+            'requests_per_sec': requests / elapsed if elapsed else 0.0,
+        }
+
+
+class SentimentServer():
+    def __init__(self, host='127.0.0.1', port=8080, analyser=None, max_batch=2000, max_wait=0.005,
+                 max_texts_per_request=10000):
+        self.analyser = analyser if analyser is not None else TwitterAnalyser()
+        self.analyser.analyse_polarity_batch([""])  # load the lexicon before the first request
+        self.batcher = MicroBatcher(self.analyser, max_batch, max_wait)
+        self.stats = LatencyStats()
+        self.max_texts_per_request = max_texts_per_request
+        self.httpd = ThreadingHTTPServer((host, port), _handler_for(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://%s:%d" % (host, port)
+
+    def serve_forever(self):
+        self.httpd.serve_forever()
+
+    # run in a background thread, for tests and the load test script
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="sentiment-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.batcher.stop()
+
+    # the /sentiment response for a list of texts, raises whatever scoring the batch raised
+    def score(self, texts):
+        start = time.monotonic()
+        cleaned, polarity = self.batcher.submit(texts).result()
+        self.stats.record(time.monotonic() - start, len(texts))
+        return {
+            'cleaned': cleaned,
+            'polarity': polarity.tolist(),
+            'sentiment': np.sign(polarity).astype(int).tolist(),
+        }
+
+
+def _handler_for(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse their connection
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._reply(200, dict(server.stats.summary(), batches=server.batcher.batches))
+            elif self.path == '/metrics/prometheus':
+                self._reply_text(200, METRICS.render())
+            elif self.path == '/health':
+                self._reply(200, {'status': 'ok'})
+            else:
+                self._reply(404, {'error': "not found"})
+
+        def do_POST(self):
+            if self.path != '/sentiment':
+                self._reply(404, {'error': "not found"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                texts = body['texts']
+                if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                    raise ValueError("texts must be a list of strings")
+            except (ValueError, KeyError, TypeError) as e:
+                self._reply(400, {'error': "bad request: %s" % str(e)})
+                return
+            if len(texts) > server.max_texts_per_request:
+                self._reply(413, {'error': "at most %d texts per request" % server.max_texts_per_request})
+                return
+            try:
+                response = server.score(texts)
+            except Exception as e:
+                self._reply(500, {'error': "scoring failed: %s" % str(e)})
+                return
+            self._reply(200, response)
+
+        def _reply(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _reply_text(self, status, text):
+            payload = text.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass  # one line per request would swamp the console
+
+    return Handler
+
+
+if __name__ == "__main__":
+    # python twitter_server.py [port]
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    start_from_env()
+    METRICS.enabled = True  # recorded for /metrics/prometheus
+    sentiment_server = SentimentServer(port=port)
+    print("scoring sentiment on %s/sentiment" % sentiment_server.url)
+    try:
+        sentiment_server.serve_forever()
+    except KeyboardInterrupt:
+        sentiment_server.stop()
@@ -0,0 +1,369 @@
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from twitter_reader import CREATED_AT_FORMAT, TWEET_FIELDS, loads
+
+
+# Sharded, rotating capture files with an index.
+# Instead of one tweets.txt that grows forever, the stream is written into shards in a directory. A new shard
+# starts when the current one reaches max_bytes or max_seconds. Inside a shard the tweets are grouped in
+# blocks (block_tweets tweets or block_seconds seconds). When a block is finished its byte offset and length,
+# tweet count, id range and time range go into index.db (sqlite) next to the shards. With compression every
+# block is its own gzip member, so the shard is still a normal .gz file but a block can be read on its own.
+# Reading a time window looks up the blocks that overlap it and reads just those byte ranges, however many
+# shards there are. The block being written is only indexed once it is finished (flush_if_due also finishes
+# one that has been open for block_seconds, so a quiet stream does not leave it unindexed), so after a crash
+# up to block_seconds of tweets are in the shard but not in the index (reindex() scans the shards to add them).
+# With compression every flush also sync flushes the block's compressor, so what was flushed before a crash
+# can be decompressed even though the block's gzip member was never finished.
+
+
+# the tweet id and the time the stream sent it, found without parsing the whole payload
+# Twitter starts every tweet with its own created_at and id, so those are only read from the very start of
+# the message: searching for the first "id": could find a nested one (a delete notice's status, or any
+# payload with its keys in another order). Anything that doesn't start that way is parsed instead.
+_HEAD = re.compile(rb'\{\s*"created_at":\s*"([^"]+)",\s*"id":\s*(\d+)[,}]')
+_TIMESTAMP_MS = re.compile(rb'"timestamp_ms":\s*"(\d+)"')
+
+
+class ShardedWriter():
+    # the same write/flush_if_due/flush/close as TweetWriter so StdOutListener can take either
+    # compress gzips every block, echo also writes each tweet to stdout
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024, max_seconds=60 * 60, block_tweets=1000,
+                 block_seconds=60, compress=False, prefix='tweets', buffer_size=64 * 1024, flush_interval=1.0,
+                 echo=False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.block_tweets = block_tweets
+        self.block_seconds = block_seconds
+        self.compress = compress
+        self.prefix = prefix
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.echo = echo
+        os.makedirs(directory, exist_ok=True)
+        self.index = ShardIndex(directory)
+        self.shards_written = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._last_flush = time.monotonic()
+
+    # write one raw tweet (bytes), the shard and block are rotated as needed
+    def write(self, raw_data):
+        with self._lock:
+            if self._file is None:
+                self._open_shard()
+            now = time.monotonic()
+            data = raw_data + b"\n"
+            if self._compressor is not None:
+                self._file.write(self._compressor.compress(data))
+            else:
+                self._file.write(data)
+            if self.echo:
+                sys.stdout.buffer.write(data)
+            self._add_to_block(raw_data)
+            if self._block_count >= self.block_tweets or now - self._block_started >= self.block_seconds:
+                if self._end_block_and_shard(now):
+                    return
+            if now - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    # also finishes a block that has been open for block_seconds, on a quiet stream the next write may be a
+    # long way off
+    def flush_if_due(self):
+        with self._lock:
+            if self._file is None:
+                return
+            now = time.monotonic()
+            if self._block_count and now - self._block_started >= self.block_seconds:
+                if not self._end_block_and_shard(now):
+                    self._flush()  # so the block the index now points at is in the file
+            elif now - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._end_block()
+                self._close_shard()
+            self.index.close()
+
+    def _open_shard(self):
+        name = "%s-%s-%05d.jsonl%s" % (self.prefix, time.strftime('%Y%m%d-%H%M%S'), len(self.shards_written),
+                                       '.gz' if self.compress else '')
+        self._name = name
+        self._file = open(os.path.join(self.directory, name), 'ab', buffering=self.buffer_size)
+        self._shard_started = time.monotonic()
+        self.shards_written.append(os.path.join(self.directory, name))
+        self._start_block()
+
+    def _close_shard(self):
+        self._file.close()
+        self._file = None
+
+    def _start_block(self):
+        self._block_offset = self._file.tell()
+        self._block_started = time.monotonic()
+        self._block_count = 0
+        self._min_id = self._max_id = None
+        self._min_time = self._max_time = None
+        # a fresh gzip member per block so it can be decompressed without the blocks before it
+        self._compressor = zlib.compressobj(wbits=31) if self.compress else None
+
+    def _add_to_block(self, raw_data):
+        self._block_count += 1
+        tweet_id, timestamp_ms = message_id_and_time(raw_data)
+        if tweet_id is not None:
+            self._min_id = tweet_id if self._min_id is None else min(self._min_id, tweet_id)
+            self._max_id = tweet_id if self._max_id is None else max(self._max_id, tweet_id)
+        self._min_time = timestamp_ms if self._min_time is None else min(self._min_time, timestamp_ms)
+        self._max_time = timestamp_ms if self._max_time is None else max(self._max_time, timestamp_ms)
+
+    # end the block, and the shard too if it is big or old enough, True if the shard was closed
+    def _end_block_and_shard(self, now):
+        self._end_block()
+        if self._file.tell() >= self.max_bytes or now - self._shard_started >= self.max_seconds:
+            self._close_shard()  # the next write opens the next shard
+            return True
+        return False
+
+    # index the finished block and start the next one in the same shard
+    def _end_block(self):
+        if self._block_count:
+            if self._compressor is not None:
+                self._file.write(self._compressor.flush())
+            length = self._file.tell() - self._block_offset
+            self.index.add_block(self._name, self._block_offset, length, self._block_count, self._min_id,
+                                 self._max_id, self._min_time, self._max_time)
+        self._start_block()
+
+    def _flush(self):
+        if self._compressor is not None and self._block_count:
+            self._file.write(self._compressor.flush(zlib.Z_SYNC_FLUSH))  # decodable without the rest of the block
+        self._file.flush()
+        if self.echo:
+            sys.stdout.flush()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# the blocks of every shard in a directory, kept in index.db
+class ShardIndex():
+    def __init__(self, directory):
+        self.directory = directory
+        self._db = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS blocks (shard TEXT NOT NULL, offset INTEGER NOT NULL, "
+                         "length INTEGER NOT NULL, tweets INTEGER NOT NULL, min_id INTEGER, max_id INTEGER, "
+                         "min_time INTEGER NOT NULL, max_time INTEGER NOT NULL, PRIMARY KEY (shard, offset))")
+        self._db.execute("CREATE INDEX IF NOT EXISTS blocks_time ON blocks (max_time, min_time)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def add_block(self, shard, offset, length, tweets, min_id, max_id, min_time, max_time):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (shard, offset, length, tweets, min_id, max_id, min_time, max_time))
+            self._db.commit()
+
+    # (shard, offset, length) of the blocks with tweets sent between start_ms and end_ms, in file order
+    def blocks(self, start_ms=None, end_ms=None):
+        sql = "SELECT shard, offset, length FROM blocks WHERE 1"
+        params = []
+        if start_ms is not None:
+            sql += " AND max_time >= ?"
+            params.append(start_ms)
+        if end_ms is not None:
+            sql += " AND min_time < ?"
+            params.append(end_ms)
+        with self._lock:
+            return self._db.execute(sql + " ORDER BY shard, offset", params).fetchall()
+
+    # one row per shard: tweets, id range, time range (ms) and size on disk
+    def shards(self):
+        with self._lock:
+            rows = self._db.execute("SELECT shard, sum(tweets), min(min_id), max(max_id), min(min_time), "
+                                    "max(max_time), sum(length) FROM blocks GROUP BY shard ORDER BY shard")
+            return [dict(zip(('shard', 'tweets', 'min_id', 'max_id', 'min_time', 'max_time', 'bytes'), row))
+                    for row in rows.fetchall()]
+
+    # the end of the last indexed block of a shard, where anything not yet indexed starts
+    def indexed_to(self, shard):
+        with self._lock:
+            row = self._db.execute("SELECT max(offset + length) FROM blocks WHERE shard = ?", (shard,)).fetchone()
+        return row[0] or 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# tweets from the shards in directory, optionally only those sent in [start, end)
+# start and end are datetimes (naive ones are taken as UTC) or seconds since the epoch
+class ShardReader():
+    def __init__(self, directory, start=None, end=None, fields=TWEET_FIELDS):
+        self.directory = directory
+        self.start_ms = _to_ms(start)
+        self.end_ms = _to_ms(end)
+        self.fields = fields
+        self.blocks_read = 0
+        self.bytes_read = 0
+
+    def __iter__(self):
+        index = ShardIndex(self.directory)
+        try:
+            blocks = index.blocks(self.start_ms, self.end_ms)
+        finally:
+            index.close()
+        shard_file = None
+        shard = None
+        try:
+            for block_shard, offset, length in blocks:
+                if block_shard != shard:
+                    if shard_file is not None:
+                        shard_file.close()
+                    shard = block_shard
+                    shard_file = open(os.path.join(self.directory, shard), 'rb')
+                shard_file.seek(offset)
+                data = shard_file.read(length)
+                self.blocks_read += 1
+                self.bytes_read += length
+                if shard.endswith('.gz'):
+                    data = _gunzip(data)
+                yield from self._tweets(data)
+        finally:
+            if shard_file is not None:
+                shard_file.close()
+
+    def _tweets(self, data):
+        fields = self.fields
+        for line in data.split(b"\n"):
+            if not line.strip():
+                continue
+            try:
+                tweet = loads(line)
+            except ValueError:
+                continue
+            if 'text' not in tweet:
+                continue
+            if self.start_ms is not None or self.end_ms is not None:
+                sent = _tweet_id_and_time(tweet)[1]
+                if (self.start_ms is not None and sent < self.start_ms) or \
+                        (self.end_ms is not None and sent >= self.end_ms):
+                    continue
+            yield tweet if fields is None else {field: tweet.get(field) for field in fields}
+
+
+# add any blocks the index is missing (the one being written when the process died) by scanning the shards
+def reindex(directory, block_tweets=1000):
+    index = ShardIndex(directory)
+    try:
+        for name in sorted(os.listdir(directory)):
+            if not (name.endswith('.jsonl') or name.endswith('.jsonl.gz')):
+                continue
+            offset = index.indexed_to(name)
+            with open(os.path.join(directory, name), 'rb') as sf:
+                sf.seek(offset)
+                data = sf.read()
+            if not data:
+                continue
+            if name.endswith('.gz'):
+                # a gzip member can't be split into smaller blocks, what is left is indexed as one
+                lines = [line for line in _gunzip(data).split(b"\n") if line.strip()]
+                _index_lines(index, name, offset, len(data), lines)
+                continue
+            position = offset
+            lines = []
+            for line in data.splitlines(keepends=True):
+                lines.append(line)
+                if len(lines) == block_tweets:
+                    length = sum(len(line) for line in lines)
+                    _index_lines(index, name, position, length, [line.strip() for line in lines if line.strip()])
+                    position += length
+                    lines = []
+            if lines:
+                length = sum(len(line) for line in lines)
+                _index_lines(index, name, position, length, [line.strip() for line in lines if line.strip()])
+    finally:
+        index.close()
+
+
+# one or more gzip members one after the other, the last one may be cut off (no trailer) after a crash
+def _gunzip(data):
+    parts = []
+    while data:
+        decompressor = zlib.decompressobj(wbits=31)
+        parts.append(decompressor.decompress(data))
+        data = decompressor.unused_data
+    return b"".join(parts)
+
+
+def _index_lines(index, shard, offset, length, lines):
+    if not lines:
+        return
+    found = [message_id_and_time(line) for line in lines]
+    ids = [tweet_id for tweet_id, sent in found if tweet_id is not None]
+    times = [sent for tweet_id, sent in found]
+    index.add_block(shard, offset, length, len(lines), min(ids) if ids else None, max(ids) if ids else None,
+                    min(times), max(times))
+
+
+# (tweet id or None, when it was sent in ms) from the raw bytes of a stream message
+# timestamp_ms is on every stream message, created_at on tweets saved from the REST API
+def message_id_and_time(raw_data):
+    match = _HEAD.match(raw_data)
+    if match is None:
+        try:
+            tweet = loads(raw_data)
+        except ValueError:
+            return None, int(time.time() * 1000)
+        return _tweet_id_and_time(tweet if isinstance(tweet, dict) else {})
+    created_at, tweet_id = match.group(1), int(match.group(2))
+    match = _TIMESTAMP_MS.search(raw_data)  # only ever on the message itself, not on the tweets inside it
+    if match:
+        return tweet_id, int(match.group(1))
+    return tweet_id, _created_at_ms(created_at.decode('ascii'))
+
+
+# the same from a parsed tweet dict, only looking at its own (top level) fields
+def _tweet_id_and_time(tweet):
+    tweet_id = tweet.get('id')
+    tweet_id = tweet_id if isinstance(tweet_id, int) else None
+    if tweet.get('timestamp_ms') is not None:
+        return tweet_id, int(tweet['timestamp_ms'])
+    if isinstance(tweet.get('created_at'), str):
+        return tweet_id, _created_at_ms(tweet['created_at'])
+    return tweet_id, int(time.time() * 1000)  # neither, use when it was written
+
+
+def _created_at_ms(created_at):
+    try:
+        return int(datetime.strptime(created_at, CREATED_AT_FORMAT).timestamp() * 1000)
+    except ValueError:
+        return int(time.time() * 1000)
+
+
+def _to_ms(when):
+    if when is None:
+        return None
+    if isinstance(when, datetime):
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return int(when.timestamp() * 1000)
+    return int(when * 1000)
@@ -1,60 +1,12 @@
 # import tools required for the streaming of relevant tweets
-from tweepy import Stream
-
-import twitter_cred
-
-
-# TWEET STREAMER
-class TwitterStreamer():  # class made to stream the tweets
-    # fetch_tweets_filename has the txt file and the hash_tag_list is the list of keywords
-    def stream_tweets(self, fetch_tweets_filename, hash_tag_list):
-        # class method to save tweets to txt file to process later
-        # this handles Twitter authentication and connection to Twitter API
-        listener = StdOutListener(fetch_tweets_filename, twitter_cred.CONSUMER_KEY, twitter_cred.CONSUMER_SECRET,
-                                  twitter_cred.ACCESS_TOKEN, twitter_cred.ACCESS_TOKEN_SECRET)
-        # filters twitter streams to capture data by keywords.
-        listener.filter(track=hash_tag_list)
-
-
-    # parameters for the class Stream//fetch tweets filename added because it was in the __init__ and made the computer
-    # think that the access token secret was  not there
-
-
-
-# basic listener class to print tweets received to stdout.
-class StdOutListener(Stream):
-    # StdOutListener is a subclass of Stream where is it adding additional functions to stream
-    # constructor to associate the object to a filename
-
-
-    # when removed
-    # Error on_data 'StdOutListener' object has no attribute
-    # 'fetch_tweets_filename'
-
-
-    def __init__(self, fetch_tweets_filename, consumer_key, consumer_secret, access_token, access_token_secret):
-        # get the data and put the data in the associated file
-        super().__init__(consumer_key, consumer_secret, access_token, access_token_secret)
-        # super calls the class extended(Stream) then call initialise method on class
-        self.fetch_tweets_filename = fetch_tweets_filename
-
-    def on_data(self, raw_data):  # rewriting the function of on_data
-        # to help deal with possible errors
-        try:
-            # if successful print and write tweet into the file
-            print(raw_data)
-            with open(self.fetch_tweets_filename, 'a') as tf:
-                tf.write(raw_data.decode('utf-8') + "\n")
-            return True
-        # if there was an error print the following
-        except BaseException as e:
-            print("Error on_data %s" % str(e))
-
-    def on_error(self, status):  # static method won't affect object
-        print(status)
+# the classes are shared with the other scripts and live in twitter_core, which leaves numpy, pandas and textblob
+# unimported until something is scored, so starting a capture only pays for tweepy
+from twitter_core import TwitterStreamer
+from twitter_metrics import start_from_env
 
 
 if __name__ == "__main__":
+    start_from_env()  # TWITTER_METRICS and TWITTER_PROFILE turn on metrics and profiling, see twitter_metrics
     # Authenticate using config.py and connect to Twitter Streaming API.
     # what is stored in hash_tag_list and the file in fetch_tweets_filename
     hash_tag_list = ["Kakashi", "Sasuke", "Raikage", "Asuma"]
@@ -65,6 +17,32 @@ if __name__ == "__main__":
     # calling the method stream_tweets which takes 2 parameters
     twitter_streamer.stream_tweets(fetch_tweets_filename, hash_tag_list)
 
+    # or rotate the capture into hourly (or 64 MB) gzipped shards with an index, then read back just a window
+    # twitter_streamer.stream_tweets_sharded("capture", hash_tag_list, max_seconds=60 * 60, compress=True)
+    # from datetime import datetime
+    # from twitter_shards import ShardReader
+    # tweets = list(ShardReader("capture", start=datetime(2022, 7, 11, 19), end=datetime(2022, 7, 11, 20)))
+
+    # or keep the stream callback free and do the work on consumer threads
+    # monitor keeps the rolling 1m/15m/1h sentiment, monitor.snapshot() gives the numbers at any moment
+    # rollups keeps hourly and daily totals per handle on disk for charts, rollups.query('*', 'day')
+    # keywords tags each tweet with the hash_tag_list entries it matched, keywords.snapshot() per keyword sentiment
+    # dedup scores each retweeted tweet (and near copies of a text) once, however many times it comes in
+    # top keeps the 10 most engaging tweets per handle and window, top.top('*', '1h', 'positive') right now
+    # from twitter_keywords import KeywordSentiment
+    # from twitter_pipeline import IngestPipeline
+    # from twitter_topk import TopTweets
+    # from twitter_windows import HandleMonitor
+    # monitor = HandleMonitor()
+    # keywords = KeywordSentiment(hash_tag_list)
+    # top = TopTweets(k=10)
+    # from twitter_rollup import RollupStore  # brings in pandas, left out of the plain capture's startup
+    # rollups = RollupStore("rollups.db")
+    # from twitter_dedup import Deduplicator
+    # pipeline = IngestPipeline(fetch_tweets_filename, handlers=[monitor, keywords, rollups, top],
+    #                           workers=2, policy='drop_oldest', dedup=Deduplicator())
+    # twitter_streamer.stream_tweets_to_pipeline(hash_tag_list, pipeline)
+
 
     # when removed fetch_tweets_filename and put just tweets.txt
     # and remove the __init__
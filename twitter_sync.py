@@ -0,0 +1,130 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from tweepy import Cursor
+
+from twitter_frame import tweets_to_frame
+from twitter_reader import TweetFileReader
+from twitter_writer import TweetWriter
+
+
+# Incremental timeline sync.
+# The highest tweet id fetched for each handle is kept in a small sqlite checkpoint file. The next sync
+# passes it as since_id so Twitter only sends the newer tweets, which are appended to the handle's saved
+# timeline (JSON lines, the same format as tweets.txt). A re-run costs about one page instead of the whole
+# timeline. The tweets are saved before the checkpoint moves, so a crash in between can only repeat tweets,
+# never lose them, and load() drops any repeats. A sync is cut off at num_tweets (the API itself only goes
+# back 3200 tweets), so when more than that were posted since the last run the tweets between the checkpoint
+# and the oldest one fetched are missing; that range is recorded as a gap rather than silently skipped.
+
+
+class CheckpointStore():
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS checkpoints "
+                         "(handle TEXT PRIMARY KEY, since_id INTEGER NOT NULL, updated REAL NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS gaps (handle TEXT NOT NULL, after_id INTEGER NOT NULL, "
+                         "before_id INTEGER NOT NULL, recorded REAL NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    # highest tweet id already fetched for the handle, None if it has never been synced
+    def get(self, handle):
+        _check_handle(handle)
+        with self._lock:
+            row = self._db.execute("SELECT since_id FROM checkpoints WHERE handle = ?", (handle,)).fetchone()
+        return row[0] if row is not None else None
+
+    # only ever moves forward
+    def set(self, handle, since_id):
+        _check_handle(handle)
+        with self._lock:
+            self._db.execute("INSERT INTO checkpoints VALUES (?, ?, ?) ON CONFLICT(handle) DO UPDATE SET "
+                             "since_id = max(since_id, excluded.since_id), updated = excluded.updated",
+                             (handle, since_id, time.time()))
+            self._db.commit()
+
+    # tweets between after_id and before_id (both excluded) were never fetched for the handle
+    def add_gap(self, handle, after_id, before_id):
+        _check_handle(handle)
+        with self._lock:
+            self._db.execute("INSERT INTO gaps VALUES (?, ?, ?, ?)", (handle, after_id, before_id, time.time()))
+            self._db.commit()
+
+    # [(after_id, before_id)] of the handle's gaps, oldest first
+    def gaps(self, handle):
+        with self._lock:
+            return self._db.execute("SELECT after_id, before_id FROM gaps WHERE handle = ? ORDER BY after_id",
+                                    (handle,)).fetchall()
+
+    def close(self):
+        self._db.close()
+
+
+class TimelineSync():
+    # api is a tweepy API, checkpoints a CheckpointStore, data_dir where each handle's timeline is saved
+    # compact makes sync() return twitter_record.TweetRecord objects instead of full Status objects
+    # (the saved timeline still has the whole payload)
+    def __init__(self, api, checkpoints, data_dir, compact=False):
+        self.api = api
+        self.checkpoints = checkpoints
+        self.data_dir = data_dir
+        self.compact = compact
+        self._me = None  # the authenticated user's screen name, once looked up
+        os.makedirs(data_dir, exist_ok=True)
+
+    # fetch up to num_tweets tweets newer than the last sync, save them and return them (newest first)
+    # handle None is the authenticated user
+    def sync(self, handle, num_tweets=3200):
+        handle = self.resolve(handle)
+        since_id = self.checkpoints.get(handle)
+        kwargs = {'screen_name': handle, 'count': 200}
+        if since_id is not None:
+            kwargs['since_id'] = since_id
+        new_tweets = list(Cursor(self.api.user_timeline, **kwargs).items(num_tweets))
+        if new_tweets:
+            with TweetWriter(self.timeline_filename(handle)) as writer:
+                for tweet in reversed(new_tweets):  # oldest first so the file reads in the order they were sent
+                    writer.write(json.dumps(tweet._json).encode('utf-8'))
+            if since_id is not None and len(new_tweets) >= num_tweets:
+                oldest = min(tweet.id for tweet in new_tweets)
+                self.checkpoints.add_gap(handle, since_id, oldest)
+                print("%s: %d or more tweets since the last sync, any between %d and %d were not fetched"
+                      % (handle, num_tweets, since_id, oldest))
+            self.checkpoints.set(handle, max(tweet.id for tweet in new_tweets))
+        if self.compact:
+            from twitter_record import to_records
+
+            return to_records(new_tweets)
+        return new_tweets
+
+    # the whole saved timeline as the tweet_to_data_frame layout, newest first
+    def load(self, handle, text_column='tweets'):
+        handle = self.resolve(handle)
+        filename = self.timeline_filename(handle)
+        if not os.path.exists(filename):
+            return tweets_to_frame([], text_column=text_column)
+        df = tweets_to_frame(TweetFileReader(filename), text_column=text_column)
+        df = df.drop_duplicates('id').sort_values('id', ascending=False)
+        return df.reset_index(drop=True)
+
+    def timeline_filename(self, handle):
+        return os.path.join(self.data_dir, "%s.jsonl" % handle)
+
+    # the screen name to checkpoint under, None (the authenticated user) is looked up once
+    def resolve(self, handle):
+        if handle is not None:
+            return handle
+        if self._me is None:
+            self._me = self.api.verify_credentials().screen_name
+        return self._me
+
+
+# a NULL handle never matches "WHERE handle = ?", so it would sync everything again on every run
+def _check_handle(handle):
+    if handle is None:
+        raise ValueError("a checkpoint needs a screen name, not None")
@@ -0,0 +1,257 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+from twitter_keywords import tweet_text
+from twitter_windows import DEFAULT_WINDOWS, tweet_timestamp
+
+
+# The most engaging tweets per handle and time window, kept up to date as tweets arrive.
+# np.max(df['likes']) needs the whole frame built again and only gives the number. TopK keeps the k best
+# tweets in a min-heap: a new tweet is compared with the smallest kept score (O(1)) and only pushed in, and
+# the smallest pushed out, when it beats it (O(log k)). A tweet seen again with a higher score (retweets keep
+# bringing the original in with its latest counts) is pushed again and the old entry is skipped when it
+# comes off the heap, so updates stay O(log k) too.
+# For time windows each window is cut into slots (1h into 60 one minute slots by default) with a TopK per
+# slot. Any tweet in the top k of a window is in the top k of its slot, so merging the live slots' lists
+# gives the exact top k of the window (to the slot: a window covers between its length minus one slot and
+# its length). Old slots are dropped as the clock moves on, so nothing grows with the number of tweets.
+# TopTweets keeps these per handle too. A track= stream brings a new author with nearly every tweet, so a
+# handle is dropped once it has had no tweet for the longest window (everything it had has expired), checked
+# as the stream's clock moves on, and at most max_handles are kept (the least recently active goes first).
+
+
+# what a tweet is ranked by
+METRICS = ('engagement', 'likes', 'retweets')
+
+SENTIMENTS = ('positive', 'negative')
+
+# one window covering everything, for ranking tweets from the past such as a user_timeline
+ALL_TIME = (('all', float('inf')),)
+
+
+class TopK():
+    def __init__(self, k):
+        self.k = k
+        self._heap = []  # (score, order, key), the smallest score on top, stale entries included
+        self._live = {}  # key -> (score, order, item) for the k tweets kept
+        self._order = 0
+
+    # keep item under key if its score is in the top k, a key already kept is only updated to a higher score
+    def add(self, key, score, item):
+        live = self._live.get(key)
+        if live is not None:
+            if score <= live[0]:
+                return False
+        elif len(self._live) >= self.k and score <= self._smallest():
+            return False  # a tie keeps the tweet that got there first
+        self._order += 1
+        self._live[key] = (score, self._order, item)
+        heapq.heappush(self._heap, (score, self._order, key))
+        while len(self._live) > self.k:
+            score, order, key = heapq.heappop(self._heap)
+            if self._is_live(order, key):
+                del self._live[key]
+        if len(self._heap) > 2 * self.k + 16:  # too many stale entries, build the heap from the live ones
+            self._heap = [(score, order, key) for key, (score, order, item) in self._live.items()]
+            heapq.heapify(self._heap)
+        return True
+
+    # [(score, key, item)] highest first
+    def top(self):
+        entries = sorted(self._live.items(), key=lambda entry: (-entry[1][0], entry[1][1]))
+        return [(score, key, item) for key, (score, order, item) in entries]
+
+    def __len__(self):
+        return len(self._live)
+
+    def _smallest(self):
+        while not self._is_live(self._heap[0][1], self._heap[0][2]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+
+    def _is_live(self, order, key):
+        live = self._live.get(key)
+        return live is not None and live[1] == order
+
+
+# the top k tweets for every window of DEFAULT_WINDOWS (label, seconds), each cut into slots slots
+class TopKWindows():
+    def __init__(self, k=10, windows=DEFAULT_WINDOWS, slots=60):
+        self.k = k
+        self.windows = tuple(windows)
+        self.slots = slots
+        self._slot_seconds = [seconds / slots for label, seconds in self.windows]
+        self._slots = [{} for _ in self.windows]  # per window: slot number -> TopK
+        self._newest = [None] * len(self.windows)  # per window: the newest slot number seen
+
+    def add(self, key, score, item, timestamp):
+        for i, slot_seconds in enumerate(self._slot_seconds):
+            slot = int(timestamp // slot_seconds)
+            newest = self._newest[i]
+            if newest is None or slot > newest:
+                self._advance(i, slot)
+            elif slot <= newest - self.slots:
+                continue  # older than this window
+            slots = self._slots[i]
+            top = slots.get(slot)
+            if top is None:
+                top = slots[slot] = TopK(self.k)
+            top.add(key, score, item)
+
+    # [(score, key, item)] highest first for the window with that label, as of now (seconds)
+    def top(self, label, now):
+        i = [window_label for window_label, seconds in self.windows].index(label)
+        self._advance(i, int(now // self._slot_seconds[i]))
+        best = {}
+        for top in self._slots[i].values():
+            for score, key, item in top.top():
+                if key not in best or score > best[key][0]:
+                    best[key] = (score, key, item)
+        return heapq.nlargest(self.k, best.values(), key=lambda entry: entry[0])
+
+    # move window i on to slot, dropping the slots that fall out of it
+    def _advance(self, i, slot):
+        newest = self._newest[i]
+        if newest is not None and slot <= newest:
+            return
+        self._newest[i] = slot
+        slots = self._slots[i]
+        if newest is None or slot - newest >= self.slots:
+            slots.clear()
+            return
+        for old in range(newest - self.slots + 1, slot - self.slots + 1):
+            slots.pop(old, None)
+
+
+# The top k tweets right now for each handle (and '*' for everything), in each window, overall and just the
+# positive or negative ones. An IngestPipeline handler. A retweet counts for the tweet it retweets, with
+# that tweet's latest like and retweet counts, under the handle that wrote it.
+# handles limits it to those screen names, None follows every handle seen, up to max_handles at a time
+# (0 keeps just '*')
+class TopTweets():
+    def __init__(self, k=10, metric='engagement', windows=DEFAULT_WINDOWS, slots=60, handles=None,
+                 max_handles=100):
+        if metric not in METRICS:
+            raise ValueError("metric must be one of %s, not %r" % (", ".join(METRICS), metric))
+        self.k = k
+        self.metric = metric
+        self.windows = tuple(windows)
+        self.slots = slots
+        self.handles = set(handles) if handles is not None else None
+        self.max_handles = max_handles if handles is None else len(self.handles)
+        self._longest = max(seconds for label, seconds in self.windows)
+        self._overall = {}  # None/'positive'/'negative' -> TopKWindows
+        # handle -> [last tweet's time, {None/'positive'/'negative': TopKWindows}], least recently active first
+        self._by_handle = OrderedDict()
+        self._now = None  # the newest time seen, for dropping idle handles
+        self._lock = threading.Lock()
+
+    # one scored tweet dict, timestamp in seconds (defaults to when it was sent, or now)
+    def add(self, tweet, polarity, timestamp=None):
+        original = tweet.get('retweeted_status') or tweet
+        handle = (original.get('user') or {}).get('screen_name')
+        item = {
+            'id': original['id'],
+            'handle': handle,
+            'text': tweet_text(original),
+            'likes': original.get('favorite_count') or 0,
+            'retweets': original.get('retweet_count') or 0,
+            'polarity': polarity,
+        }
+        if timestamp is None:
+            timestamp = tweet_timestamp(tweet)
+        self._add(item, timestamp if timestamp is not None else time.time())
+
+    # IngestPipeline handler
+    def __call__(self, tweets, polarity):
+        for tweet, tweet_polarity in zip(tweets, polarity):
+            self.add(tweet, float(tweet_polarity))
+
+    # a TwitterAnalyser data frame with a sentiment (or polarity) column, e.g. a user_timeline of handle
+    def add_frame(self, df, handle, text_column='tweets', sentiment_column='sentiment'):
+        import pandas as pd
+
+        seconds = pd.DatetimeIndex(df['date']).as_unit('s').asi8
+        for text, tweet_id, likes, retweets, sentiment, second in zip(
+                df[text_column].tolist(), df['id'].tolist(), df['likes'].tolist(), df['retweets'].tolist(),
+                df[sentiment_column].tolist(), seconds.tolist()):
+            self._add({'id': tweet_id, 'handle': handle, 'text': text, 'likes': likes, 'retweets': retweets,
+                       'polarity': float(sentiment)}, second)
+
+    # the top tweets (dicts with id, handle, text, likes, retweets, polarity and score) highest first
+    # sentiment is None for every tweet, 'positive' or 'negative' for just those
+    def top(self, handle='*', window=None, sentiment=None, now=None):
+        window = window if window is not None else self.windows[-1][0]
+        now = now if now is not None else time.time()
+        with self._lock:
+            self._expire(now)
+            if handle == '*':
+                windows = self._overall.get(sentiment)
+            else:
+                entry = self._by_handle.get(handle)
+                windows = entry[1].get(sentiment) if entry is not None else None
+            if windows is None:
+                return []
+            entries = windows.top(window, now)
+        return [dict(item, score=score) for score, key, item in entries]
+
+    # the top tweets of every window, overall and by sentiment, for a dashboard
+    def snapshot(self, handle='*', now=None):
+        now = now if now is not None else time.time()
+        return {label: {str(sentiment or 'all'): self.top(handle, label, sentiment, now)
+                        for sentiment in (None,) + SENTIMENTS}
+                for label, seconds in self.windows}
+
+    # the handles being kept right now, least recently active first
+    def followed(self):
+        with self._lock:
+            return list(self._by_handle)
+
+    def _add(self, item, timestamp):
+        score = _score(item, self.metric)
+        sentiment = 'positive' if item['polarity'] > 0 else 'negative' if item['polarity'] < 0 else None
+        handle = item['handle']
+        follow = handle is not None and (self.handles is None or handle in self.handles)
+        with self._lock:
+            self._expire(timestamp)
+            self._add_to(self._overall, item, score, sentiment, timestamp)
+            if not follow or self.max_handles <= 0:
+                return
+            entry = self._by_handle.get(handle)
+            if entry is None:
+                while len(self._by_handle) >= self.max_handles:
+                    self._by_handle.popitem(last=False)
+                entry = self._by_handle[handle] = [timestamp, {}]
+            else:
+                self._by_handle.move_to_end(handle)
+                entry[0] = max(entry[0], timestamp)
+            self._add_to(entry[1], item, score, sentiment, timestamp)
+
+    def _add_to(self, by_sentiment, item, score, sentiment, timestamp):
+        for key in (None, sentiment) if sentiment else (None,):
+            windows = by_sentiment.get(key)
+            if windows is None:
+                windows = by_sentiment[key] = TopKWindows(self.k, self.windows, self.slots)
+            windows.add(item['id'], score, item, timestamp)
+
+    # move the clock on to now and drop the handles with nothing left in any window
+    # they are in order of activity, so only the idle ones at the front are looked at
+    def _expire(self, now):
+        if self._now is not None and now <= self._now:
+            return
+        self._now = now
+        while self._by_handle:
+            handle, entry = next(iter(self._by_handle.items()))
+            if entry[0] > now - self._longest:
+                break
+            del self._by_handle[handle]
+
+
+def _score(item, metric):
+    if metric == 'likes':
+        return item['likes']
+    if metric == 'retweets':
+        return item['retweets']
+    return item['likes'] + item['retweets']
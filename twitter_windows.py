@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Rolling sentiment over sliding time windows, updated as tweets arrive.
+# Time is cut into one second buckets kept in a ring as long as the longest window. Each window keeps
+# running totals; a tweet adds to its bucket and to every window's totals, and when the clock moves on
+# the buckets falling out of a window are taken off its totals. So adding a tweet is O(1) and asking for
+# the current numbers never goes back over the history.
+
+
+# label -> length in seconds
+DEFAULT_WINDOWS = (('1m', 60), ('15m', 15 * 60), ('1h', 60 * 60))
+
+
+class SentimentWindows():
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(windows)
+        self.size = max(seconds for label, seconds in self.windows)
+        # per second buckets: tweets, polarity sum, positive, negative
+        self._count = [0] * self.size
+        self._polarity = [0.0] * self.size
+        self._positive = [0] * self.size
+        self._negative = [0] * self.size
+        # running totals per window, in the same order as self.windows
+        self._totals = [[0, 0.0, 0, 0] for _ in self.windows]
+        self._now = None  # the newest second the buckets cover
+        self._lock = threading.Lock()
+
+    # add one scored tweet, timestamp is in seconds (defaults to now)
+    def add(self, polarity, timestamp=None):
+        second = int(timestamp if timestamp is not None else time.time())
+        with self._lock:
+            self._advance(second)
+            age = self._now - second
+            if age >= self.size:
+                return  # older than the longest window
+            i = second % self.size
+            positive = polarity > 0
+            negative = polarity < 0
+            self._count[i] += 1
+            self._polarity[i] += polarity
+            self._positive[i] += positive
+            self._negative[i] += negative
+            for (label, seconds), totals in zip(self.windows, self._totals):
+                if age < seconds:  # a late tweet only counts in the windows that still cover its second
+                    totals[0] += 1
+                    totals[1] += polarity
+                    totals[2] += positive
+                    totals[3] += negative
+
+    # IngestPipeline handler, uses the time Twitter sent each tweet
+    def __call__(self, tweets, polarity):
+        for tweet, tweet_polarity in zip(tweets, polarity):
+            self.add(float(tweet_polarity), tweet_timestamp(tweet))
+
+    # {label: {'count', 'mean_polarity', 'positive', 'negative', 'neutral'}} for every window as of now
+    def snapshot(self, now=None):
+        with self._lock:
+            self._advance(int(now if now is not None else time.time()))
+            result = {}
+            for (label, seconds), (count, polarity, positive, negative) in zip(self.windows, self._totals):
+                result[label] = {
+                    'count': count,
+                    'mean_polarity': polarity / count if count else 0.0,
+                    'positive': positive,
+                    'negative': negative,
+                    'neutral': count - positive - negative,
+                }
+            return result
+
+    # move the newest second forward, taking the seconds that leave each window off its totals
+    def _advance(self, second):
+        if self._now is None:
+            self._now = second
+            return
+        if second <= self._now:
+            return
+        if second - self._now >= self.size:  # quiet for longer than the longest window, start again
+            for i in range(self.size):
+                self._clear(i)
+            for totals in self._totals:
+                totals[:] = [0, 0.0, 0, 0]
+            self._now = second
+            return
+        for new_second in range(self._now + 1, second + 1):
+            for (label, seconds), totals in zip(self.windows, self._totals):
+                i = (new_second - seconds) % self.size  # the second leaving this window
+                totals[0] -= self._count[i]
+                totals[1] -= self._polarity[i]
+                totals[2] -= self._positive[i]
+                totals[3] -= self._negative[i]
+            self._clear(new_second % self.size)  # reuse the oldest bucket for the new second
+        self._now = second
+
+    def _clear(self, i):
+        self._count[i] = 0
+        self._polarity[i] = 0.0
+        self._positive[i] = 0
+        self._negative[i] = 0
+
+
+# rolling sentiment for each twitter handle (and '*' for everything) as tweets come off the stream
+# handles limits it to those screen names, None follows every handle seen
+# Each handle costs a SentimentWindows (about 115 KB with DEFAULT_WINDOWS), and a track= stream brings a new
+# author with nearly every tweet, so at most max_handles are kept: when a new one comes in, the handle that
+# has gone longest without a tweet is dropped and starts again from nothing if it comes back.
+# max_handles=0 keeps just '*'.
+class HandleMonitor():
+    def __init__(self, handles=None, windows=DEFAULT_WINDOWS, max_handles=100):
+        self.handles = set(handles) if handles is not None else None
+        self.windows = windows
+        self.max_handles = max_handles if handles is None else len(self.handles)
+        self.overall = SentimentWindows(windows)
+        self._by_handle = OrderedDict()  # handle -> SentimentWindows, least recently active first
+        self._lock = threading.Lock()
+
+    # IngestPipeline handler
+    def __call__(self, tweets, polarity):
+        for tweet, tweet_polarity in zip(tweets, polarity):
+            tweet_polarity = float(tweet_polarity)
+            timestamp = tweet_timestamp(tweet)
+            self.overall.add(tweet_polarity, timestamp)
+            handle = tweet.get('user', {}).get('screen_name')
+            if handle is None or (self.handles is not None and handle not in self.handles):
+                continue
+            windows = self._windows_for(handle)
+            if windows is not None:
+                windows.add(tweet_polarity, timestamp)
+
+    # a handle that isn't followed (or was dropped) has all zeros
+    def snapshot(self, handle='*', now=None):
+        if handle == '*':
+            return self.overall.snapshot(now)
+        with self._lock:
+            windows = self._by_handle.get(handle)
+        if windows is None:
+            windows = SentimentWindows(self.windows)
+        return windows.snapshot(now)
+
+    # the handles with windows right now, least recently active first
+    def followed(self):
+        with self._lock:
+            return list(self._by_handle)
+
+    def _windows_for(self, handle):
+        with self._lock:
+            windows = self._by_handle.get(handle)
+            if windows is not None:
+                self._by_handle.move_to_end(handle)
+                return windows
+            if self.max_handles <= 0:
+                return None
+            while len(self._by_handle) >= self.max_handles:
+                self._by_handle.popitem(last=False)
+            windows = self._by_handle[handle] = SentimentWindows(self.windows)
+            return windows
+
+
+# when a streamed tweet was sent, in seconds (timestamp_ms is on every stream message)
+def tweet_timestamp(tweet):
+    timestamp_ms = tweet.get('timestamp_ms')
+    return int(timestamp_ms) / 1000.0 if timestamp_ms is not None else None
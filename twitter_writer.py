@@ -0,0 +1,59 @@
+import sys
+import threading
+import time
+
+
+# Writer for the raw tweets coming off the stream.
+# StdOutListener used to open the capture file, append one tweet and close it again for every message.
+# TweetWriter keeps the file open and lets writes build up in a buffer, which is flushed to disk when it
+# fills up (buffer_size bytes), when flush_interval seconds have passed since the last flush, and on close.
+
+
+class TweetWriter():
+    # echo also writes each tweet to stdout like the listeners used to
+    def __init__(self, filename, buffer_size=64 * 1024, flush_interval=1.0, echo=False):
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.echo = echo
+        # binary mode so the raw bytes from the stream go to disk as they are, no decode and encode again
+        self._file = open(filename, 'ab', buffering=buffer_size)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    # write one raw tweet (bytes) followed by a newline
+    def write(self, raw_data):
+        with self._lock:
+            self._file.write(raw_data)
+            self._file.write(b"\n")
+            if self.echo:
+                sys.stdout.buffer.write(raw_data + b"\n")
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    # flush only if flush_interval has passed, for quiet streams where no write comes along to do it
+    def flush_if_due(self):
+        with self._lock:
+            if not self._file.closed and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()  # close flushes whatever is left in the buffer
+
+    def _flush(self):
+        self._file.flush()
+        if self.echo:
+            sys.stdout.flush()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()